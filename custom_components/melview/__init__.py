@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 
+from aiohttp import ClientError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD, Platform
 from homeassistant.core import HomeAssistant
@@ -14,14 +16,32 @@ from homeassistant.exceptions import (
 )
 from homeassistant.helpers import device_registry as dr, issue_registry as ir
 
-from .const import CONF_LOCAL, CONF_SENSOR, DOMAIN
+from .const import (
+    CONF_API_URL,
+    CONF_BUILDING,
+    CONF_FRESHNESS,
+    CONF_HEDGE,
+    CONF_LOCAL,
+    CONF_SENSOR,
+    DATA_SNAPSHOT,
+    DATA_STARTUP,
+    DATA_VALIDATED_AUTH,
+    DOMAIN,
+)
 from .coordinator import MelViewCoordinator
-from .melview import MelView, MelViewAuthentication
+from .pymelview import API_URL, STATE_FRESHNESS, MelView, MelViewAuthentication
+from .services import async_setup_services
+from .snapshot import FleetSnapshot
+from .startup import StartupTimer
 
 type MelViewConfigEntry = ConfigEntry[list[MelViewCoordinator]]
 
 _LOGGER = logging.getLogger(__name__)
 
+# Login retries while starting from a snapshot, in seconds.
+GO_LIVE_RETRY = 30
+GO_LIVE_MAX_RETRY = 600
+
 PLATFORMS = [
     Platform.CLIMATE,
     Platform.SWITCH,
@@ -32,7 +52,7 @@ PLATFORMS = [
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    """Set up MelView; YAML is no longer supported (warn once if present)."""
+    """Set up MelView services; YAML is no longer supported (warn once if present)."""
     if DOMAIN in config:
         hass.data.setdefault(DOMAIN, {})
         if not hass.data[DOMAIN].get("_yaml_warned"):
@@ -42,6 +62,7 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
                 DOMAIN,
             )
             hass.data[DOMAIN]["_yaml_warned"] = True
+    async_setup_services(hass)
     return True
 
 
@@ -50,8 +71,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: MelViewConfigEntry) -> b
     await async_migrate_entry(hass, entry)
     conf = entry.data
     options = entry.options
-    mv_auth = MelViewAuthentication(conf[CONF_EMAIL], conf[CONF_PASSWORD])
-    result = await mv_auth.async_login()
+    timer = StartupTimer()
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_STARTUP, {})[
+        entry.entry_id
+    ] = timer
+    # Kept across reloads so unload and removal act on the same pending save.
+    snapshot = (
+        hass.data[DOMAIN]
+        .setdefault(DATA_SNAPSHOT, {})
+        .setdefault(entry.entry_id, FleetSnapshot(hass, entry))
+    )
+    mv_auth = _pop_validated_auth(hass, conf)
+    if mv_auth is not None:
+        _LOGGER.debug("Reusing login from config flow")
+        timer.path = "setup with the config flow login"
+        result = True
+    else:
+        with timer.phase("snapshot_load"):
+            units = await snapshot.async_load()
+        if units:
+            timer.path = "setup from snapshot"
+            return await _async_setup_from_snapshot(
+                hass, entry, snapshot, units, timer
+            )
+        timer.path = "setup"
+        mv_auth = MelViewAuthentication(
+            conf[CONF_EMAIL],
+            conf[CONF_PASSWORD],
+            base_url=conf.get(CONF_API_URL, API_URL),
+        )
+        try:
+            with timer.phase("login"):
+                result = await mv_auth.async_login()
+        except (ClientError, TimeoutError) as err:
+            raise ConfigEntryNotReady(f"Unable to reach MelView: {err!r}") from err
     if not result:
         _LOGGER.error("MelView authentication failed for %s", conf[CONF_EMAIL])
         ir.async_create_issue(
@@ -66,7 +119,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: MelViewConfigEntry) -> b
         )
         raise ConfigEntryAuthFailed
     _LOGGER.debug("Authentication successful")
-    melview = MelView(mv_auth, localcontrol=options.get(CONF_LOCAL))
+    melview = MelView(
+        mv_auth,
+        localcontrol=options.get(CONF_LOCAL),
+        hedged_reads=options.get(CONF_HEDGE, False),
+        freshness=options.get(CONF_FRESHNESS, STATE_FRESHNESS),
+    )
 
     units = mv_auth.number_units()
     if units is False:
@@ -78,35 +136,192 @@ async def async_setup_entry(hass: HomeAssistant, entry: MelViewConfigEntry) -> b
         raise ConfigEntryError("Account has no devices")
 
     _LOGGER.debug("Getting data")
-    devices = await melview.async_get_devices_list()
+    try:
+        with timer.phase("rooms"):
+            devices = await melview.async_get_devices_list(refresh=False)
+    except (ClientError, TimeoutError) as err:
+        raise ConfigEntryNotReady(f"Unable to retrieve device list: {err!r}") from err
     if not devices:
         _LOGGER.debug("Unable to retrieve device list")
         raise ConfigEntryNotReady("Unable to retrieve device list")
 
-    _cleanup_removed_devices(hass, entry, {str(device.get_id()) for device in devices})
+    active_ids = {str(device.get_id()) for device in devices}
+    if options.get(CONF_BUILDING, False):
+        active_ids |= {f"building_{device.get_building_id()}" for device in devices}
+    _cleanup_removed_devices(hass, entry, active_ids)
 
     device_list = []
     for device in devices:
-        coordinator = MelViewCoordinator(hass, entry, device)
-        await coordinator.async_config_entry_first_refresh()
-        _LOGGER.debug("Device: %s", device.get_friendly_name())
+        name = device.get_friendly_name()
+        try:
+            with timer.phase("caps", device.get_id(), name):
+                caps_ok = await device.async_refresh_device_caps()
+        except (ClientError, TimeoutError) as err:
+            raise ConfigEntryNotReady(
+                f"Unable to retrieve capabilities of {name}: {err!r}"
+            ) from err
+        if not caps_ok:
+            raise ConfigEntryNotReady(f"Unable to retrieve capabilities of {name}")
+        coordinator = MelViewCoordinator(hass, entry, device, snapshot)
+        with timer.phase("first_refresh", device.get_id(), name):
+            await coordinator.async_config_entry_first_refresh()
+        _LOGGER.debug("Device: %s", name)
         device_list.append(coordinator)
     entry.runtime_data = device_list
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    with timer.phase("platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _log_startup(entry, timer)
 
     _LOGGER.debug("Set up coordinator(s): %s", entry.runtime_data)
     return True
 
 
+def _log_startup(entry: MelViewConfigEntry, timer: StartupTimer) -> None:
+    timer.finish()
+    _LOGGER.info("MelView %s: %s", entry.title, timer.summary())
+
+
+async def _async_setup_from_snapshot(
+    hass: HomeAssistant,
+    entry: MelViewConfigEntry,
+    snapshot: FleetSnapshot,
+    units: list[dict],
+    timer: StartupTimer,
+) -> bool:
+    """Create the entities from the last run's snapshot, then go live.
+
+    Entities are marked stale until their first live poll. Login and the
+    device list check run in the background, so a slow or unreachable cloud
+    does not hold up startup.
+    """
+    conf = entry.data
+    options = entry.options
+    mv_auth = MelViewAuthentication(
+        conf[CONF_EMAIL],
+        conf[CONF_PASSWORD],
+        base_url=conf.get(CONF_API_URL, API_URL),
+    )
+    melview = MelView(
+        mv_auth,
+        localcontrol=options.get(CONF_LOCAL),
+        hedged_reads=options.get(CONF_HEDGE, False),
+        freshness=options.get(CONF_FRESHNESS, STATE_FRESHNESS),
+    )
+    devices = melview.get_devices_from_snapshot(units)
+    active_ids = {str(device.get_id()) for device in devices}
+    if options.get(CONF_BUILDING, False):
+        active_ids |= {f"building_{device.get_building_id()}" for device in devices}
+    _cleanup_removed_devices(hass, entry, active_ids)
+
+    device_list = []
+    for device in devices:
+        coordinator = MelViewCoordinator(hass, entry, device, snapshot)
+        coordinator.async_restore()
+        device_list.append(coordinator)
+    entry.runtime_data = device_list
+    _LOGGER.debug("Restored %d unit(s) from snapshot", len(device_list))
+    with timer.phase("platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    entry.async_create_background_task(
+        hass,
+        _async_go_live(hass, entry, melview, mv_auth, snapshot, timer),
+        f"{DOMAIN} go live {entry.entry_id}",
+    )
+    return True
+
+
+async def _async_go_live(
+    hass: HomeAssistant,
+    entry: MelViewConfigEntry,
+    melview: MelView,
+    mv_auth: MelViewAuthentication,
+    snapshot: FleetSnapshot,
+    timer: StartupTimer,
+) -> None:
+    """Log in and replace the restored state with live data.
+
+    The startup timing covers this too, as the entities are only live
+    once it has finished.
+    """
+    delay = GO_LIVE_RETRY
+    while True:
+        try:
+            with timer.phase("login"):
+                result = await mv_auth.async_login()
+            break
+        except Exception as err:
+            # Anything but a rejection of the credentials, e.g. a 5xx or an
+            # HTML error page, is an outage to wait out.
+            _LOGGER.warning(
+                "Unable to reach MelView (%r), keeping restored state; "
+                "retrying in %d s",
+                err,
+                delay,
+            )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, GO_LIVE_MAX_RETRY)
+    if not result:
+        _LOGGER.error("MelView authentication failed for %s", entry.data[CONF_EMAIL])
+        entry.async_start_reauth(hass)
+        return
+
+    with timer.phase("rooms"):
+        devices = await melview.async_get_devices_list(refresh=False)
+    if devices is not None:
+        live_ids = {str(device.get_id()) for device in devices}
+        restored_ids = {
+            str(coordinator.device.get_id()) for coordinator in entry.runtime_data
+        }
+        if live_ids != restored_ids:
+            # Rediscover from scratch so added and removed units are handled.
+            _LOGGER.info("MelView units changed since the last run, reloading")
+            await snapshot.async_remove()
+            hass.config_entries.async_schedule_reload(entry.entry_id)
+            return
+
+    async def _async_first_refresh(coordinator: MelViewCoordinator) -> None:
+        device = coordinator.device
+        with timer.phase("first_refresh", device.get_id(), device.get_friendly_name()):
+            await coordinator.async_refresh()
+
+    await asyncio.gather(
+        *(_async_first_refresh(coordinator) for coordinator in entry.runtime_data)
+    )
+    _log_startup(entry, timer)
+
+
 async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(
         config_entry, PLATFORMS
     )
+    if unload_ok:
+        hass.data.get(DOMAIN, {}).get(DATA_STARTUP, {}).pop(
+            config_entry.entry_id, None
+        )
+        snapshot = hass.data.get(DOMAIN, {}).get(DATA_SNAPSHOT, {}).get(
+            config_entry.entry_id
+        )
+        if snapshot is not None:
+            # Written now rather than by a delayed save outliving the entry.
+            await snapshot.async_flush()
+        for coordinator in config_entry.runtime_data:
+            await coordinator.device.async_close()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored snapshot of a removed account."""
+    snapshot = hass.data.get(DOMAIN, {}).get(DATA_SNAPSHOT, {}).pop(
+        entry.entry_id, None
+    )
+    if snapshot is None:
+        snapshot = FleetSnapshot(hass, entry)
+    await snapshot.async_remove()
+
+
 async def async_migrate_entry(hass, config_entry):
     """Migrate old config entry."""
     data = {**config_entry.data}
@@ -121,6 +336,20 @@ async def async_migrate_entry(hass, config_entry):
     return True
 
 
+def _pop_validated_auth(hass: HomeAssistant, conf) -> MelViewAuthentication | None:
+    """Take the login the config flow just validated for this account, if any."""
+    validated = hass.data.get(DOMAIN, {}).get(DATA_VALIDATED_AUTH, {})
+    mv_auth = validated.pop(conf[CONF_EMAIL], None)
+    if (
+        mv_auth is None
+        or not mv_auth.is_login()
+        or not mv_auth.has_credentials(conf[CONF_EMAIL], conf[CONF_PASSWORD])
+        or mv_auth.base_url != conf.get(CONF_API_URL, API_URL)
+    ):
+        return None
+    return mv_auth
+
+
 def _cleanup_removed_devices(
     hass: HomeAssistant, config_entry: ConfigEntry, active_device_ids: set[str]
 ) -> None:
@@ -1,4 +1,8 @@
 import logging
+from collections import Counter
+from functools import partial
+
+import voluptuous as vol
 
 from homeassistant.components import logbook
 from homeassistant.components.climate import ClimateEntity
@@ -14,13 +18,21 @@ from homeassistant.const import (
     STATE_OFF,
     UnitOfTemperature,
 )
+from homeassistant.core import callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.entity import DeviceInfo
 
-from .coordinator import MelViewCoordinator
-from .entity import MelViewBaseEntity
-from .melview import MODE, VERTICAL_VANE, HORIZONTAL_VANE
+from .const import CONF_BUILDING, DOMAIN, MANUFACTURER
+from .coordinator import MelViewCoordinator, async_send_to_units
+from .entity import MelViewBaseEntity, traced
+from .pymelview import HORIZONTAL_VANE, MODE, VERTICAL_VANE
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_SET_ZONES = "set_zones"
+ATTR_ZONES = "zones"
+
 
 class MelViewClimate(MelViewBaseEntity, ClimateEntity):
     """MelView handler for Home Assistant"""
@@ -38,7 +50,7 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
         self._name = device.get_friendly_name()
         self._attr_unique_id = device.get_id()
 
-        self._operations_list = [x for x in MODE] + [HVACMode.OFF]
+        self._operations_list = [HVACMode(x) for x in MODE] + [HVACMode.OFF]
         self._speeds_list = [x for x in self._device.fan_keyed]
 
         self._precision = PRECISION_WHOLE
@@ -59,8 +71,6 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
         self._has_vertical_vane = getattr(self._device, "has_vertical_vane", False)
         self._has_horizontal_vane = getattr(self._device, "has_horizontal_vane", False)
 
-        await self._device.async_force_update()
-
     @property
     def supported_features(self):
         """Let HASS know feature support"""
@@ -95,6 +105,13 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
         """Check unit is on"""
         return self.state != STATE_OFF
 
+    @property
+    def extra_state_attributes(self):
+        """Flag state that the last poll did not confirm"""
+        if self.coordinator.stale:
+            return {"stale": True}
+        return None
+
     @property
     def precision(self):
         """Return the precision of the system"""
@@ -155,7 +172,7 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
         mode = next(
             (mode for mode, val in MODE.items() if val == mode_index), HVACMode.AUTO
         )
-        return mode
+        return HVACMode(mode)
 
     @property
     def hvac_modes(self):
@@ -189,20 +206,22 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
             return HVACAction.FAN
         return None
 
+    @traced
     async def async_set_temperature(self, **kwargs) -> None:
         """Set the target temperature"""
         temp = kwargs.get(ATTR_TEMPERATURE)
         if temp is not None:
             _LOGGER.debug("Set temperature %d", temp)
             if await self._device.async_set_temperature(temp):
-                await self.coordinator.async_refresh()
+                self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_set_fan_mode(self, fan_mode) -> None:
         """Set the fan speed"""
         speed = fan_mode
         _LOGGER.debug("Set fan: %s", speed)
         if await self._device.async_set_speed(speed):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
             parsed_speed = fan_mode.title()
             logbook.log_entry(
                 hass=self.hass,
@@ -211,24 +230,27 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
                 entity_id=self.entity_id,
             )
 
+    @traced
     async def async_set_hvac_mode(self, hvac_mode) -> None:
         _LOGGER.debug("Set mode: %s", hvac_mode)
         if hvac_mode == HVACMode.OFF:
             await self.async_turn_off()
         elif await self._device.async_set_mode(hvac_mode):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_turn_on(self) -> None:
         """Turn on the unit"""
         _LOGGER.debug("Power on")
         if await self._device.async_power_on():
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_turn_off(self) -> None:
         """Turn off the unit"""
         _LOGGER.debug("Power off")
         if await self._device.async_power_off():
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
     @property
     def swing_mode(self) -> str | None:
@@ -245,11 +267,12 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
             return None
         return list(VERTICAL_VANE.values())
 
+    @traced
     async def async_set_swing_mode(self, swing_mode: str) -> None:
         """Set vertical vane position."""
         _LOGGER.debug("Set vertical vane: %s", swing_mode)
         if await self._device.async_set_vertical_vane(swing_mode):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
     @property
     def swing_horizontal_mode(self) -> str | None:
@@ -266,11 +289,245 @@ class MelViewClimate(MelViewBaseEntity, ClimateEntity):
             return None
         return list(HORIZONTAL_VANE.values())
 
+    @traced
     async def async_set_swing_horizontal_mode(self, swing_horizontal_mode: str) -> None:
         """Set horizontal vane position."""
         _LOGGER.debug("Set horizontal vane: %s", swing_horizontal_mode)
         if await self._device.async_set_horizontal_vane(swing_horizontal_mode):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
+
+    @traced
+    async def async_set_zones(self, zones: dict[str, bool]) -> None:
+        """Turn several zones, given by ID or name, on or off at once."""
+        by_name = {
+            str(zone.name).casefold(): zone.id for zone in self._device.get_zones()
+        }
+        by_id = {str(zone.id): zone.id for zone in self._device.get_zones()}
+        mask = {}
+        for key, on in zones.items():
+            zoneid = by_id.get(key, by_name.get(key.casefold()))
+            if zoneid is None:
+                raise ServiceValidationError(
+                    f"Unknown zone {key} for {self._device.get_friendly_name()}"
+                )
+            mask[zoneid] = on
+        _LOGGER.debug("Set zones: %s", mask)
+        if await self._device.async_set_zones(mask):
+            self.coordinator.async_schedule_confirmation()
+
+
+class MelViewBuildingClimate(ClimateEntity):
+    """Climate entity controlling every air conditioner in a building."""
+
+    _attr_has_entity_name = True
+    _attr_name = None
+    _attr_should_poll = False
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+    _enable_turn_on_off_backwards_compatibility = False
+
+    def __init__(self, coordinators: list[MelViewCoordinator]):
+        device = coordinators[0].device
+        self._coordinators = coordinators
+        self._attr_unique_id = f"building_{device.get_building_id()}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._attr_unique_id)},
+            name=device.get_building_name(),
+            manufacturer=MANUFACTURER,
+            model="Building",
+        )
+        self._attr_hvac_modes = [HVACMode(x) for x in MODE] + [HVACMode.OFF]
+        common_speeds = set(device.fan_keyed).intersection(
+            *(coordinator.device.fan_keyed for coordinator in coordinators)
+        )
+        self._attr_fan_modes = [x for x in device.fan_keyed if x in common_speeds]
+        if all(coordinator.device.halfdeg for coordinator in coordinators):
+            self._attr_precision = PRECISION_HALVES
+            self._attr_target_temperature_step = 0.5
+        else:
+            self._attr_precision = PRECISION_WHOLE
+            self._attr_target_temperature_step = 1.0
+
+        # Latest snapshot of each member and the running totals built from them,
+        # so a member update only adjusts the totals by its own change.
+        self._members: dict[str, tuple] = {}
+        self._on_count = 0
+        self._modes: Counter = Counter()
+        self._target_sum = 0.0
+        self._target_count = 0
+        self._room_sum = 0.0
+        self._room_count = 0
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates from every member unit."""
+        await super().async_added_to_hass()
+        for coordinator in self._coordinators:
+            self._update_member(coordinator)
+            self.async_on_remove(
+                coordinator.async_add_listener(
+                    partial(self._handle_member_update, coordinator)
+                )
+            )
+
+    @callback
+    def _handle_member_update(self, coordinator: MelViewCoordinator) -> None:
+        self._update_member(coordinator)
+        self.async_write_ha_state()
+
+    def _update_member(self, coordinator: MelViewCoordinator) -> None:
+        """Replace a member's contribution to the building totals."""
+        unit_id = str(coordinator.device.get_id())
+        previous = self._members.pop(unit_id, None)
+        if previous is not None:
+            self._account(previous, -1)
+        data = coordinator.data if coordinator.last_update_success else None
+        if data:
+            snapshot = _member_snapshot(data)
+            self._members[unit_id] = snapshot
+            self._account(snapshot, 1)
+
+    def _account(self, snapshot: tuple, sign: int) -> None:
+        power, mode, target, room = snapshot
+        if power:
+            self._on_count += sign
+            self._modes[mode] += sign
+        if target is not None:
+            self._target_sum += sign * target
+            self._target_count += sign
+        if room is not None:
+            self._room_sum += sign * room
+            self._room_count += sign
+
+    @property
+    def available(self) -> bool:
+        """Available while any member unit has data."""
+        return bool(self._members)
+
+    @property
+    def supported_features(self):
+        """Let HASS know feature support"""
+        features = (
+            ClimateEntityFeature.TARGET_TEMPERATURE
+            | ClimateEntityFeature.TURN_ON
+            | ClimateEntityFeature.TURN_OFF
+        )
+        if self._attr_fan_modes:
+            features |= ClimateEntityFeature.FAN_MODE
+        return features
+
+    @property
+    def hvac_mode(self):
+        """Return the most common mode among the units that are on."""
+        if self._on_count <= 0:
+            return HVACMode.OFF
+        return self._modes.most_common(1)[0][0]
+
+    @property
+    def current_temperature(self) -> float | None:
+        """Return the mean room temperature of the member units."""
+        if not self._room_count:
+            return None
+        return round(self._room_sum / self._room_count, 1)
+
+    @property
+    def target_temperature(self) -> float | None:
+        """Return the mean target temperature of the member units."""
+        if not self._target_count:
+            return None
+        return round(self._target_sum / self._target_count, 1)
+
+    @property
+    def min_temp(self) -> float:
+        """Return the highest minimum temperature among the member units."""
+        mins = [
+            coordinator.device.temp_ranges[self.hvac_mode]["min"]
+            for coordinator in self._coordinators
+            if self.hvac_mode in coordinator.device.temp_ranges
+        ]
+        return max(mins) if mins else super().min_temp
+
+    @property
+    def max_temp(self) -> float:
+        """Return the lowest maximum temperature among the member units."""
+        maxes = [
+            coordinator.device.temp_ranges[self.hvac_mode]["max"]
+            for coordinator in self._coordinators
+            if self.hvac_mode in coordinator.device.temp_ranges
+        ]
+        return min(maxes) if maxes else super().max_temp
+
+    @property
+    def extra_state_attributes(self):
+        """Return how many member units are on."""
+        return {"units": len(self._coordinators), "units_on": self._on_count}
+
+    async def _async_set_all(self, **state) -> None:
+        """Send the requested state to every member unit at once."""
+        targets = []
+        for coordinator in self._coordinators:
+            try:
+                commands = coordinator.device.get_state_commands(**state)
+            except ValueError as err:
+                _LOGGER.warning(
+                    "Skipping %s: %s", coordinator.device.get_friendly_name(), err
+                )
+                continue
+            targets.append((coordinator, commands))
+        await async_send_to_units(targets, source=f"{self.entity_id} set_all")
+
+    async def async_set_temperature(self, **kwargs) -> None:
+        """Set the target temperature of every unit"""
+        temp = kwargs.get(ATTR_TEMPERATURE)
+        if temp is not None:
+            _LOGGER.debug("Set building temperature %s", temp)
+            await self._async_set_all(temperature=temp)
+
+    async def async_set_fan_mode(self, fan_mode) -> None:
+        """Set the fan speed of every unit"""
+        _LOGGER.debug("Set building fan: %s", fan_mode)
+        await self._async_set_all(fan_speed=fan_mode)
+
+    async def async_set_hvac_mode(self, hvac_mode) -> None:
+        """Set the operating mode of every unit"""
+        _LOGGER.debug("Set building mode: %s", hvac_mode)
+        if hvac_mode == HVACMode.OFF:
+            await self._async_set_all(power=False)
+        else:
+            await self._async_set_all(mode=hvac_mode)
+
+    async def async_turn_on(self) -> None:
+        """Turn on every unit"""
+        await self._async_set_all(power=True)
+
+    async def async_turn_off(self) -> None:
+        """Turn off every unit"""
+        await self._async_set_all(power=False)
+
+    async def async_set_zones(self, zones: dict[str, bool]) -> None:
+        """Reject zone changes, which only apply to a single ducted unit."""
+        raise ServiceValidationError(
+            f"{self.entity_id} controls a whole building; target the climate "
+            "entity of a ducted unit to set its zones"
+        )
+
+
+def _member_snapshot(data: dict) -> tuple:
+    """Reduce a unit's state to what the building entity aggregates."""
+    power = data.get("power", 0) != 0
+    mode = HVACMode(
+        next(
+            (mode for mode, val in MODE.items() if val == data.get("setmode")),
+            HVACMode.AUTO,
+        )
+    )
+    try:
+        target = float(data["settemp"])
+    except (KeyError, TypeError, ValueError):
+        target = None
+    try:
+        room = float(data["roomtemp"])
+    except (KeyError, TypeError, ValueError):
+        room = None
+    return power, mode, target, room
 
 
 async def async_setup_entry(hass, entry, async_add_entities) -> None:
@@ -281,4 +538,18 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
         for coordinator in coordinators
         if coordinator.device.get_unit_type() != "ERV"
     ]
-    async_add_entities(entities, update_before_add=True)
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_ZONES,
+        {vol.Required(ATTR_ZONES): vol.Schema({vol.Coerce(str): cv.boolean})},
+        "async_set_zones",
+    )
+    if entry.options.get(CONF_BUILDING, False):
+        buildings: dict[str, list[MelViewCoordinator]] = {}
+        for entity in entities:
+            building_id = str(entity.coordinator.device.get_building_id())
+            buildings.setdefault(building_id, []).append(entity.coordinator)
+        entities.extend(
+            MelViewBuildingClimate(members) for members in buildings.values()
+        )
+    async_add_entities(entities)
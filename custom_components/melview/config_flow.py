@@ -12,8 +12,16 @@ from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 from homeassistant.core import callback
 
-from .const import CONF_LOCAL, CONF_SENSOR, DOMAIN
-from .melview import MelViewAuthentication
+from .const import (
+    CONF_BUILDING,
+    CONF_FRESHNESS,
+    CONF_HEDGE,
+    CONF_LOCAL,
+    CONF_SENSOR,
+    DATA_VALIDATED_AUTH,
+    DOMAIN,
+)
+from .pymelview import STATE_FRESHNESS, MelViewAuthentication
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,10 +35,26 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize."""
         self._errors: dict[str, str] = {}
 
-    async def _create_entry(self, email: str, password: str, local: bool, sensor: bool):
+    def _hand_over_auth(self, email: str, auth: MelViewAuthentication) -> None:
+        """Let the next setup of this account reuse the validated login."""
+        self.hass.data.setdefault(DOMAIN, {}).setdefault(DATA_VALIDATED_AUTH, {})[
+            email
+        ] = auth
+
+    async def _create_entry(
+        self,
+        email: str,
+        password: str,
+        local: bool,
+        sensor: bool,
+        auth: MelViewAuthentication,
+    ):
         """Register new entry."""
         await self.async_set_unique_id(email)
         self._abort_if_unique_id_configured({CONF_EMAIL: email})
+        # Only once the entry is certain to be created, so an aborted flow
+        # does not leave the login (and password) behind in hass.data.
+        self._hand_over_auth(email, auth)
         return self.async_create_entry(
             title=email,
             data={
@@ -116,7 +140,7 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 errors=self._errors,
             )
 
-        return await self._create_entry(email, password, local, sensor)
+        return await self._create_entry(email, password, local, sensor, auth)
 
     async def async_step_user(self, user_input=None):
         """User initiated config flow."""
@@ -172,6 +196,7 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
             data = dict(entry.data)
             data[CONF_PASSWORD] = user_input[CONF_PASSWORD]
+            self._hand_over_auth(email, auth)
 
             return self.async_update_reload_and_abort(
                 entry, data=data, reason="password_change_success"
@@ -216,6 +241,7 @@ class FlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
             new_data = dict(entry.data)
             new_data[CONF_PASSWORD] = user_input[CONF_PASSWORD]
+            self._hand_over_auth(email, auth)
             self.hass.config_entries.async_update_entry(entry, data=new_data)
             await self.hass.config_entries.async_reload(entry.entry_id)
             return self.async_abort(reason="reauth_successful")
@@ -247,6 +273,9 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
 
         local = True
         sensor = True
+        building = self._config_entry.options.get(CONF_BUILDING, False)
+        hedge = self._config_entry.options.get(CONF_HEDGE, False)
+        freshness = self._config_entry.options.get(CONF_FRESHNESS, STATE_FRESHNESS)
 
         if CONF_LOCAL in self._config_entry.data:
             local = self._config_entry.data[CONF_LOCAL]
@@ -265,6 +294,11 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 {
                     vol.Required(CONF_LOCAL, default=local): bool,
                     vol.Required(CONF_SENSOR, default=sensor): bool,
+                    vol.Required(CONF_BUILDING, default=building): bool,
+                    vol.Required(CONF_HEDGE, default=hedge): bool,
+                    vol.Required(CONF_FRESHNESS, default=freshness): vol.All(
+                        vol.Coerce(int), vol.Range(min=10, max=600)
+                    ),
                 }
             ),
         )
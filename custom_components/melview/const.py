@@ -7,9 +7,15 @@ CONF_EMAIL = "email"
 CONF_PASSWORD = "password"
 CONF_LOCAL = "local"
 CONF_SENSOR = "sensor"
+CONF_BUILDING = "building"
+CONF_HEDGE = "hedge"
+CONF_FRESHNESS = "freshness"
+# Not exposed in the UI; lets tools point an entry at a stand-in API.
+CONF_API_URL = "api_url"
 
-APPVERSION = "6.5.2090"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.4 Safari/605.1.15"
-}
-APIVERSION = 3
+# hass.data key for logins validated by the config flow, keyed by email.
+DATA_VALIDATED_AUTH = "validated_auth"
+# hass.data key for the startup timing of each config entry, keyed by entry ID.
+DATA_STARTUP = "startup"
+# hass.data key for the fleet snapshot of each config entry, keyed by entry ID.
+DATA_SNAPSHOT = "snapshot"
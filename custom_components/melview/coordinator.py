@@ -1,46 +1,345 @@
-import json
+import asyncio
 import logging
+import random
+import time
+from collections import deque
+from collections.abc import Callable
 from datetime import timedelta
 
+from homeassistant.core import callback
+from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .melview import MelViewDevice
+from .pymelview import LazyJson, MelViewCommError, MelViewDevice
+from .snapshot import FleetSnapshot
+from .telemetry import UnitTelemetry
 
 _LOGGER = logging.getLogger(__name__)
 
+# Overall budget for one poll, in seconds; kept below the poll interval.
+POLL_DEADLINE = 25
+# Room the poll deadline leaves above one state read's own timeout, so a
+# failed attempt can still back off and retry within it.
+POLL_RETRY_MARGIN = 5
+# Extra time the outer poll timeout allows after the deadline handed to the
+# read, so the read's own budget ends first and reports its error.
+POLL_DEADLINE_SLACK = 2
+# How long the last good state is served after polls start failing, before
+# the entities become unavailable.
+STALE_GRACE = 300
+# Consecutive COMM faults before a unit is quarantined.
+QUARANTINE_AFTER = 3
+# Longest poll interval for a quarantined unit.
+QUARANTINE_MAX_INTERVAL = timedelta(minutes=30)
+# Poll durations kept per unit.
+POLL_SAMPLES = 100
+# Units commanded at the same time by multi-unit operations.
+DEFAULT_PARALLEL = 8
+# Reads made to confirm a command, each after twice the previous wait.
+CONFIRM_ATTEMPTS = 3
+# Spread of the next poll after a failure, as a fraction of the interval, so
+# units recovering from a cloud outage do not all poll at the same moment.
+FAILURE_JITTER = 0.25
+
 
 class MelViewCoordinator(DataUpdateCoordinator):
     """Coordinator to fetch data from a MelView API once per interval."""
 
-    def __init__(self, hass, config_entry, device: MelViewDevice):
+    def __init__(
+        self,
+        hass,
+        config_entry,
+        device: MelViewDevice,
+        snapshot: FleetSnapshot | None = None,
+    ):
         """Initialize."""
+        # Polling is the regular revalidation of the device's state cache,
+        # so both use the same freshness.
+        self._base_interval = timedelta(seconds=device.freshness)
         super().__init__(
             hass,
             _LOGGER,
             name=f"MelView: {device.get_friendly_name()}",
             config_entry=config_entry,
-            update_interval=timedelta(seconds=30),
+            update_interval=self._base_interval,
             always_update=True,
         )
         self.device = device
-        self._caps: dict | None = None
+        device.revalidate_handler = self.async_request_refresh
+        self.snapshot = snapshot
+        # Set while the data comes from the snapshot of a previous run.
+        self.restored = False
+        # Set while the data is older than the last poll, i.e. restored or
+        # kept through failed polls during the grace window.
+        self.stale = False
+        self.stale_grace = STALE_GRACE
+        self._last_success: float | None = None
+        self._confirm_task: asyncio.Task | None = None
+        self._confirm_waiting = False
+        # Set while a confirmation read runs, so the poll forces a fresh read.
+        self._confirming = False
+        self.telemetry = UnitTelemetry()
+        self.comm_faults = 0
+        self.poll_deadline = max(
+            min(POLL_DEADLINE, device.freshness),
+            device._authentication.timeouts["state"].total + POLL_RETRY_MARGIN,
+        )
+        self.poll_durations: deque[float] = deque(maxlen=POLL_SAMPLES)
+        self.poll_count = 0
+        self.poll_successes = 0
+        self._latency_listeners: list[Callable[[], None]] = []
 
     def __getattr__(self, name: str):
         """Forward any missing attribute lookups to the underlying MelViewDevice."""
         return getattr(self.device, name)
 
+    async def async_config_entry_first_refresh(self) -> None:
+        """Refresh for setup, starting a unit in COMM fault quarantined.
+
+        A single offline unit must not keep the whole account from setting
+        up, so its entities start unavailable and are probed at the
+        quarantine interval instead.
+        """
+        try:
+            await super().async_config_entry_first_refresh()
+        except ConfigEntryNotReady:
+            if not self.comm_faults:
+                raise
+            self.comm_faults = max(self.comm_faults, QUARANTINE_AFTER - 1)
+            self._record_comm_fault()
+            # Keep the faulted payload so the entities have their attributes.
+            self.data = self.device._json
+
+    @callback
+    def async_restore(self) -> None:
+        """Serve the restored device state until the first live poll."""
+        self.data = self.device._json
+        self.restored = True
+        self.stale = True
+
+    @callback
+    def async_schedule_confirmation(self) -> None:
+        """Read the state once the last command should be reflected.
+
+        A newer command restarts the wait; a confirmation read already in
+        progress carries on and also covers the newer command.
+        """
+        if self._confirm_task is not None and not self._confirm_task.done():
+            if not self._confirm_waiting:
+                return
+            self._confirm_task.cancel()
+        self._confirm_task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_confirm(),
+            f"melview confirm {self.device.get_id()}",
+        )
+
+    async def _async_confirm(self) -> None:
+        delay = self.device.reflect_delay
+        for _ in range(CONFIRM_ATTEMPTS):
+            self._confirm_waiting = True
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._confirm_waiting = False
+            if not self.device.awaiting_confirmation:
+                # A regular poll has already shown the new state.
+                return
+            self._confirming = True
+            try:
+                await self.async_refresh()
+            finally:
+                self._confirming = False
+            if not self.device.awaiting_confirmation:
+                return
+            delay *= 2
+        _LOGGER.debug(
+            "%s did not reflect the last command after %d reads",
+            self.device.get_friendly_name(),
+            CONFIRM_ATTEMPTS,
+        )
+        self.device.abandon_confirmation()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the entities, then close the traces their new state confirms."""
+        super().async_update_listeners()
+        if self.device.finish_traces():
+            for update_callback in list(self._latency_listeners):
+                update_callback()
+
+    @callback
+    def async_add_latency_listener(
+        self, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for newly confirmed commands; returns a remove function."""
+        self._latency_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._latency_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @property
+    def quarantined(self) -> bool:
+        """Return whether polling is backed off after repeated COMM faults."""
+        return self.comm_faults >= QUARANTINE_AFTER
+
+    def _record_comm_fault(self) -> None:
+        """Back off polling while the unit keeps reporting COMM faults."""
+        self.comm_faults += 1
+        if not self.quarantined:
+            return
+        backoff = 2 ** min(self.comm_faults - QUARANTINE_AFTER + 1, 10)
+        self.update_interval = min(
+            self._base_interval * backoff, QUARANTINE_MAX_INTERVAL
+        )
+        if self.comm_faults == QUARANTINE_AFTER:
+            _LOGGER.warning(
+                "%s is offline (COMM fault), polling every %s until it recovers",
+                self.device.get_friendly_name(),
+                self.update_interval,
+            )
+
+    def _record_healthy(self) -> None:
+        if self.quarantined:
+            _LOGGER.info(
+                "%s is communicating again, resuming normal polling",
+                self.device.get_friendly_name(),
+            )
+        self.update_interval = self._base_interval
+        self.comm_faults = 0
+
+    def _record_failure(self) -> None:
+        """Jitter the next poll so failed units spread out their retries."""
+        if self.quarantined:
+            return
+        self.update_interval = self._base_interval * random.uniform(
+            1 - FAILURE_JITTER, 1 + FAILURE_JITTER
+        )
+
     async def _async_update_data(self):
-        """Fetch data from the MelView API."""
+        """Fetch data, serving the last good state through short outages.
+
+        Within the grace window after the last successful poll a failed poll
+        keeps the previous data, flagged stale, instead of making every
+        entity unavailable.
+        """
+        try:
+            return await self._async_timed_poll()
+        except UpdateFailed as err:
+            if (
+                self.data is None
+                or self._last_success is None
+                or time.monotonic() - self._last_success >= self.stale_grace
+            ):
+                raise
+            _LOGGER.debug(
+                "%s: poll failed, serving last state: %s",
+                self.device.get_friendly_name(),
+                err,
+            )
+            self.stale = True
+            return self.data
+
+    async def _async_timed_poll(self):
+        """Fetch data from the MelView API within the poll deadline.
+
+        A quarantined unit is probed with the same single state read, just
+        less often, until it answers without a COMM fault. The deadline is
+        handed to the reads, so their retries stop in time rather than
+        carrying on in a shared read after the poll has given up.
+        """
+        start = time.monotonic()
+        deadline = start + self.poll_deadline
+        self.poll_count += 1
         try:
-            if self._caps is None:
-                self._caps = await self.device.async_refresh_device_caps()
-                _LOGGER.debug(
-                    "Unit capabilities: %s", json.dumps(self.device._caps, indent=2)
-                )
-            ok = await self.device.async_refresh_device_info()
-            if not ok or self.device._json is None:
-                raise UpdateFailed("Failed to refresh MelView info")
-            _LOGGER.debug("Data: %s", json.dumps(self.device._json, indent=2))
-            return self.device._json
+            async with asyncio.timeout(self.poll_deadline + POLL_DEADLINE_SLACK):
+                data = await self._async_poll(deadline)
+        except MelViewCommError as err:
+            self._record_comm_fault()
+            self._record_failure()
+            raise UpdateFailed(str(err)) from err
+        except TimeoutError as err:
+            self._record_failure()
+            raise UpdateFailed(
+                f"Poll exceeded its {self.poll_deadline} s deadline"
+            ) from err
+        except UpdateFailed:
+            self._record_failure()
+            raise
         except Exception as err:
+            self._record_failure()
             raise UpdateFailed(str(err)) from err
+        finally:
+            self.poll_durations.append(time.monotonic() - start)
+        self.poll_successes += 1
+        return data
+
+    async def _async_poll(self, deadline=None):
+        if self.restored and not self.device._authentication.is_login():
+            # Keep the restored state until the background login has finished.
+            return self.data
+        if self.device._caps is None or self.restored:
+            await self.device.async_refresh_device_caps(deadline=deadline)
+            _LOGGER.debug("Unit capabilities: %s", LazyJson(self.device._caps))
+        if self._confirming:
+            ok = await self.device.async_confirm_state(deadline)
+        elif self.data is None:
+            # The first refresh reuses the state read during discovery.
+            ok = await self.device.async_refresh_device_info(
+                max_age=self.device.freshness, deadline=deadline
+            )
+        else:
+            ok = await self.device.async_refresh_device_info(deadline=deadline)
+        if not ok or self.device._json is None:
+            raise UpdateFailed("Failed to refresh MelView info")
+        _LOGGER.debug("Data: %s", LazyJson(self.device._json))
+        if self.device._json is not self.data:
+            self.telemetry.record(time.time(), self.device._json)
+        self._record_healthy()
+        self._last_success = time.monotonic()
+        self.restored = False
+        self.stale = False
+        if self.snapshot is not None:
+            self.snapshot.async_schedule_save()
+        return self.device._json
+
+
+async def async_send_to_units(
+    targets: list[tuple[MelViewCoordinator, list[str]]],
+    max_parallel: int = DEFAULT_PARALLEL,
+    source: str = "bulk_command",
+) -> dict[str, bool]:
+    """Send commands to many units concurrently, then confirm each one.
+
+    Each unit's commands are traced under ``source``. Returns whether each
+    unit accepted its commands, keyed by unit ID.
+    """
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def _async_send(coordinator: MelViewCoordinator, commands: list[str]):
+        with coordinator.device.trace_command(source):
+            async with semaphore:
+                try:
+                    return await coordinator.device.async_send_commands(commands)
+                except Exception as err:
+                    _LOGGER.warning(
+                        "Commands %s failed for %s: %s",
+                        commands,
+                        coordinator.device.get_friendly_name(),
+                        err,
+                    )
+                    return False
+
+    results = await asyncio.gather(
+        *(_async_send(coordinator, commands) for coordinator, commands in targets)
+    )
+    for (coordinator, _), ok in zip(targets, results):
+        if ok:
+            coordinator.async_schedule_confirmation()
+    return {
+        str(coordinator.device.get_id()): ok
+        for (coordinator, _), ok in zip(targets, results)
+    }
@@ -0,0 +1,128 @@
+"""Diagnostics support for MelView."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceEntry
+
+from .const import CONF_API_URL, DATA_STARTUP, DOMAIN
+from .coordinator import MelViewCoordinator
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_API_URL,
+    "title",
+    "unique_id",
+    "localip",
+    "host",
+    "mac",
+    "macaddress",
+    "serial",
+    "serialno",
+    "ssid",
+    "lc",
+}
+
+
+def _coordinator_diagnostics(coordinator: MelViewCoordinator) -> dict[str, Any]:
+    """Return the performance snapshot and recent payloads of one unit."""
+    device = coordinator.device
+    durations = coordinator.poll_durations
+    return {
+        "unit_id": device.get_id(),
+        "name": device.get_friendly_name(),
+        "building_id": device.get_building_id(),
+        "unit_type": device.get_unit_type(),
+        "polling": {
+            "interval": coordinator.update_interval.total_seconds(),
+            "deadline": coordinator.poll_deadline,
+            "last_duration": durations[-1] if durations else None,
+            "mean_duration": sum(durations) / len(durations) if durations else None,
+            "count": coordinator.poll_count,
+            "successes": coordinator.poll_successes,
+            "failures": coordinator.poll_count - coordinator.poll_successes,
+            "last_update_success": coordinator.last_update_success,
+            "comm_faults": coordinator.comm_faults,
+            "quarantined": coordinator.quarantined,
+            "stale": coordinator.stale,
+            "restored": coordinator.restored,
+        },
+        "cache_age": device.get_cache_ages(),
+        "commands_in_flight": device.commands_in_flight,
+        "polls_merged": device.polls_merged,
+        "commands_superseded": device.commands_superseded,
+        "confirmation": {
+            "reflect_delay": device.reflect_delay,
+            "confirmed": device.confirmations,
+            "abandoned": device.confirmations_abandoned,
+            "pending": device.awaiting_confirmation,
+        },
+        "hedged_reads": {
+            "fired": device.hedges_fired,
+            "won": device.hedges_won,
+            "skipped": device.hedges_skipped,
+        },
+        "local_delivery": device.get_local_stats(),
+        "command_latency": device.get_command_latency(),
+        "command_traces": [trace.as_dict() for trace in device.traces],
+        "caps": device._caps,
+        "recent_states": [
+            {"time": timestamp, "state": state}
+            for timestamp, state in device.recent_states
+        ],
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    timer = hass.data.get(DOMAIN, {}).get(DATA_STARTUP, {}).get(entry.entry_id)
+    return async_redact_data(
+        {
+            "entry": entry.as_dict(),
+            "scheduler": (
+                entry.runtime_data[0].device._authentication.scheduler.get_stats()
+                if entry.runtime_data
+                else None
+            ),
+            "retries": (
+                entry.runtime_data[0].device._authentication.retry_policy.get_stats()
+                if entry.runtime_data
+                else None
+            ),
+            "startup": timer.as_dict() if timer is not None else None,
+            "units": [
+                _coordinator_diagnostics(coordinator)
+                for coordinator in entry.runtime_data
+            ],
+        },
+        TO_REDACT,
+    )
+
+
+async def async_get_device_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry, device: DeviceEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a unit, or for every unit of a building."""
+    ids = {
+        str(identifier[1])
+        for identifier in device.identifiers
+        if identifier[0] == DOMAIN
+    }
+    coordinators = [
+        coordinator
+        for coordinator in entry.runtime_data
+        if str(coordinator.device.get_id()) in ids
+        or f"building_{coordinator.device.get_building_id()}" in ids
+    ]
+    return async_redact_data(
+        {"units": [_coordinator_diagnostics(c) for c in coordinators]},
+        TO_REDACT,
+    )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from functools import wraps
+
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -7,6 +9,17 @@ from .const import DOMAIN, MANUFACTURER
 from .coordinator import MelViewCoordinator
 
 
+def traced(func):
+    """Trace the commands an entity setter sends, named after the setter."""
+
+    @wraps(func)
+    async def wrapper(self: MelViewBaseEntity, *args, **kwargs):
+        with self._device.trace_command(f"{self.entity_id} {func.__name__}"):
+            return await func(self, *args, **kwargs)
+
+    return wrapper
+
+
 class MelViewBaseEntity(CoordinatorEntity[MelViewCoordinator]):
     """Shared base for all MelView entities."""
 
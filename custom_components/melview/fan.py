@@ -9,8 +9,8 @@ from homeassistant.util.percentage import (
 )
 
 from .coordinator import MelViewCoordinator
-from .entity import MelViewBaseEntity
-from .melview import LOSSNAY_PRESETS
+from .entity import MelViewBaseEntity, traced
+from .pymelview import LOSSNAY_PRESETS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,6 +47,7 @@ class MelViewLossnayFan(MelViewBaseEntity, FanEntity):
             (name for name, val in LOSSNAY_PRESETS.items() if val == code), None
         )
 
+    @traced
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         if preset_mode not in LOSSNAY_PRESETS:
             _LOGGER.error("Preset mode %s not supported", preset_mode)
@@ -56,8 +57,9 @@ class MelViewLossnayFan(MelViewBaseEntity, FanEntity):
                 return
         if await self.coordinator.async_set_lossnay_preset(preset_mode):
             self._last_preset = preset_mode
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_turn_on(
         self,
         preset_mode: str | None = None,
@@ -70,11 +72,12 @@ class MelViewLossnayFan(MelViewBaseEntity, FanEntity):
             await self.async_set_percentage(percentage)
         else:
             if await self.coordinator.async_power_on():
-                await self.coordinator.async_request_refresh()
+                self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_turn_off(self, **kwargs) -> None:
         if await self.coordinator.async_power_off():
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_schedule_confirmation()
 
     @property
     def percentage(self) -> int | None:
@@ -100,13 +103,14 @@ class MelViewLossnayFan(MelViewBaseEntity, FanEntity):
         )
         return count
 
+    @traced
     async def async_set_percentage(self, percentage: int) -> None:
         code = percentage_to_ordered_list_item(self._speed_codes, percentage)
         _LOGGER.debug(
             "Lossnay fan set speed with percentage=%d, mapped code=%s", percentage, code
         )
         if await self.coordinator.async_set_speed_code(code):
-            await self.coordinator.async_request_refresh()
+            self.coordinator.async_schedule_confirmation()
 
 
 async def async_setup_entry(hass, entry, async_add_entities) -> None:
@@ -118,4 +122,4 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
         if coordinator.device.get_unit_type() == "ERV"
     ]
     if entities:
-        async_add_entities(entities, update_before_add=True)
+        async_add_entities(entities)
@@ -0,0 +1,66 @@
+"""Async client for the MelView cloud API and Wi-Fi adapters.
+
+This package does not depend on Home Assistant. Outside the integration it
+can be imported on its own by appending ``custom_components/melview`` to
+``sys.path`` (appending, so ``select.py`` there does not shadow the standard
+library module)::
+
+    sys.path.append("custom_components/melview")
+    from pymelview import MelView, MelViewAuthentication
+
+Names are loaded on first use, so importing the modes and payload models
+does not import aiohttp.
+"""
+
+from __future__ import annotations
+
+import importlib
+
+_EXPORTS = {
+    "API_URL": "const",
+    "APIVERSION": "const",
+    "APPVERSION": "const",
+    "HEADERS": "const",
+    "LOCAL_URL": "const",
+    "Building": "models",
+    "CommandResponse": "models",
+    "LoginResponse": "models",
+    "MelViewMode": "models",
+    "RoomUnit": "models",
+    "TemperatureRange": "models",
+    "UnitCaps": "models",
+    "UnitSnapshot": "models",
+    "UnitState": "models",
+    "Zone": "models",
+    "CommandTrace": "client",
+    "FANSTAGES": "client",
+    "HORIZONTAL_VANE": "client",
+    "LOSSNAY_PRESETS": "client",
+    "MODE": "client",
+    "STATE_FRESHNESS": "client",
+    "VERTICAL_VANE": "client",
+    "JsonCodec": "client",
+    "LazyJson": "client",
+    "MelView": "client",
+    "MelViewAuthentication": "client",
+    "MelViewCommError": "client",
+    "MelViewDevice": "client",
+    "MelViewLocalAdapter": "client",
+    "MelViewScheduler": "client",
+    "MelViewServerError": "client",
+    "RetryPolicy": "client",
+    "expected_state": "client",
+    "json_dumps": "client",
+    "set_json_codec": "client",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,1969 @@
+"""MelView account, unit and local adapter handlers."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import random
+import secrets
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from aiohttp import (
+    ClientConnectionError,
+    ClientError,
+    ClientConnectorError,
+    ClientPayloadError,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+)
+
+from .const import API_URL, APIVERSION, APPVERSION, HEADERS, LOCAL_URL
+from .models import (
+    Building,
+    CommandResponse,
+    MelViewMode,
+    UnitCaps,
+    UnitSnapshot,
+    UnitState,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional outside Home Assistant
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+# State reads finishing within this window are shared with new callers.
+INFO_COALESCE_SECONDS = 2
+# Cached state older than this is served while it is revalidated.
+STATE_FRESHNESS = 30
+# Local commands waiting for delivery; the oldest is dropped when full.
+LOCAL_QUEUE_SIZE = 4
+# The adapter holds the connection open while horizontal vanes move, but an
+# adapter on the LAN that does not accept a connection quickly is gone.
+LOCAL_TIMEOUT = ClientTimeout(total=35, connect=2)
+# Consecutive local failures before delivery is skipped for a cooldown, which
+# doubles on each failed retry up to the maximum.
+LOCAL_BREAKER_AFTER = 3
+LOCAL_BREAKER_COOLDOWN = 60
+LOCAL_BREAKER_MAX_COOLDOWN = 900
+# State payloads kept per unit for diagnostics.
+RECENT_STATES = 5
+# Hedged state reads fire a second request after this percentile of recent
+# read latencies, or after the default delay until enough reads are known.
+HEDGE_SAMPLES = 50
+HEDGE_MIN_SAMPLES = 10
+HEDGE_PERCENTILE = 0.95
+HEDGE_DEFAULT_DELAY = 2.0
+# Cloud requests in flight per account. Polls may not use the reserved slots,
+# so a command never waits behind a full wave of polls.
+ACCOUNT_REQUEST_LIMIT = 16
+COMMAND_RESERVED_SLOTS = 4
+# Scheduling priorities, lowest first.
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+# The read confirming a command waits for the delay this unit usually takes
+# to reflect commands, smoothed over recent commands.
+CONFIRM_DEFAULT_DELAY = 2.0
+CONFIRM_MIN_DELAY = 0.5
+CONFIRM_MAX_DELAY = 30.0
+CONFIRM_SMOOTHING = 0.3
+# A first read that already shows the command only bounds the delay from
+# above, so it counts as this much shorter to let the estimate come down.
+CONFIRM_SHRINK = 0.8
+# State fields set by each command code.
+COMMAND_FIELDS = {
+    "PW": "power",
+    "MD": "setmode",
+    "TS": "settemp",
+    "FS": "setfan",
+    "AV": "airdir",
+    "AH": "airdirh",
+}
+# Command codes where only the latest value matters: setpoint, fan speed and
+# vanes. A newer command of the same code supersedes an older pending one.
+SUPERSEDABLE_COMMANDS = {"TS", "FS", "AV", "AH"}
+# Transient cloud failures are retried with exponential backoff and full
+# jitter, within an overall time budget in seconds.
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+RETRY_BUDGET = 15.0
+# Statuses worth retrying for reads, and the subset where the server clearly
+# did not act on the request, so a command can be retried too.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+UNPROCESSED_STATUSES = {429, 503}
+# Command traces kept per unit, and confirmed command latencies averaged.
+COMMAND_TRACES = 20
+COMMAND_LATENCY_SAMPLES = 50
+# Login statuses that mean the credentials were rejected, like a 200 without
+# an auth cookie; any other failing status is a server error.
+LOGIN_REJECTED_STATUSES = {401, 403}
+# Deadlines per cloud endpoint, replacing aiohttp's 5 minute default.
+DEFAULT_TIMEOUTS = {
+    "login": ClientTimeout(total=20, connect=5, sock_read=15),
+    "rooms": ClientTimeout(total=20, connect=5, sock_read=15),
+    "caps": ClientTimeout(total=15, connect=5, sock_read=10),
+    "state": ClientTimeout(total=10, connect=5, sock_read=8),
+    "command": ClientTimeout(total=15, connect=5, sock_read=10),
+}
+
+LOCAL_DATA = """<?xml version="1.0" encoding="UTF-8"?>
+<ESV>{}</ESV>"""
+
+MODE = {
+    MelViewMode.AUTO: 8,
+    MelViewMode.HEAT: 1,
+    MelViewMode.COOL: 3,
+    MelViewMode.DRY: 2,
+    MelViewMode.FAN_ONLY: 7,
+}
+
+FANSTAGES = {
+    1: {5: "on"},
+    2: {2: "low", 5: "high"},
+    3: {2: "low", 3: "medium", 5: "high"},
+    4: {2: "low", 3: "medium", 5: "high", 6: "Max"},
+    5: {1: "low", 2: "medium", 3: "Medium High", 5: "high", 6: "Max"},
+}
+
+LOSSNAY_PRESETS = {
+    "Lossnay": 1,
+    "Bypass": 7,
+    "Auto Lossnay": 3,
+}
+
+VERTICAL_VANE = {
+    0: "Auto",
+    1: "Up",
+    2: "Upper",
+    3: "Middle",
+    4: "Lower",
+    5: "Down",
+    7: "Swing",
+}
+
+HORIZONTAL_VANE = {
+    0: "Auto",
+    1: "Far Left",
+    2: "Left",
+    3: "Centre",
+    4: "Right",
+    5: "Far Right",
+    8: "Split",
+    12: "Swing",
+}
+
+
+class JsonCodec:
+    """JSON encoder/decoder used for API payloads."""
+
+    def __init__(self, loads, dumps):
+        self.loads = loads
+        self.dumps = dumps
+
+
+def _orjson_dumps(obj) -> str:
+    return orjson.dumps(
+        obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode()
+
+
+def _stdlib_dumps(obj) -> str:
+    return json.dumps(obj, indent=2)
+
+
+if orjson is not None:
+    _codec = JsonCodec(orjson.loads, _orjson_dumps)
+else:  # pragma: no cover - bundled with Home Assistant
+    _codec = JsonCodec(json.loads, _stdlib_dumps)
+
+
+def set_json_codec(codec: JsonCodec) -> None:
+    """Replace the codec used to decode responses and encode diagnostics."""
+    global _codec
+    _codec = codec
+
+
+def json_dumps(obj) -> str:
+    """Encode a payload as indented JSON text."""
+    return _codec.dumps(obj)
+
+
+class LazyJson:
+    """Defer encoding a payload until a log record is actually emitted."""
+
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj):
+        self._obj = obj
+
+    def __str__(self) -> str:
+        return _codec.dumps(self._obj)
+
+
+async def _async_read_json(resp):
+    """Decode a response straight from its body bytes.
+
+    A body that is not JSON, such as an HTML error page, raises
+    ClientPayloadError so it is handled like any other client error.
+    """
+    body = await resp.read()
+    try:
+        return _codec.loads(body)
+    except ValueError as err:
+        raise ClientPayloadError(
+            f"Invalid JSON in response from {resp.url} (status {resp.status})"
+        ) from err
+
+
+def expected_state(commands: str) -> dict:
+    """Return the state a comma-separated command string should lead to.
+
+    Zone commands are collected under ``zones``, keyed by zone ID.
+    """
+    expected = {}
+    for command in commands.split(","):
+        code, value = command[:2], command[2:]
+        try:
+            if code in COMMAND_FIELDS:
+                expected[COMMAND_FIELDS[code]] = float(value)
+            elif command.startswith("Z") and len(command) > 2:
+                expected.setdefault("zones", {})[command[1:-1]] = int(command[-1])
+        except ValueError:
+            continue
+    return expected
+
+
+def state_matches(state: UnitState, expected: dict) -> bool:
+    """Return whether a state payload shows every expected value."""
+    for field, value in expected.items():
+        if field == "zones":
+            # A zone that is on may report spill (2) rather than on (1).
+            zones = {
+                str(z["zoneid"]): bool(z["status"]) for z in state.get("zones", [])
+            }
+            if any(
+                zones.get(zone, bool(status)) != bool(status)
+                for zone, status in value.items()
+            ):
+                return False
+        elif field in state:
+            try:
+                if abs(float(state[field]) - value) > 0.01:
+                    return False
+            except (TypeError, ValueError):
+                return False
+    return True
+
+
+class MelViewCommError(ConnectionError):
+    """Unit is not communicating with the MelView server (COMM fault)."""
+
+
+class MelViewServerError(ClientError):
+    """The cloud failed a request instead of accepting or rejecting it."""
+
+
+class CommandTrace:
+    """Timed spans of one user action, from the setter to the state write.
+
+    Spans are stored with their start as seconds since the trace began. A
+    trace ends with an outcome: "confirmed" once a state read shows the
+    command, or "failed", "superseded" or "unconfirmed".
+    """
+
+    def __init__(self, source: str):
+        self.trace_id = secrets.token_hex(4)
+        self.source = source
+        self.commands: list[str] = []
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.sent_at: float | None = None
+        self.reflected_at: float | None = None
+        self.spans: list[dict] = []
+        self.outcome: str | None = None
+        self.duration: float | None = None
+
+    def add_span(self, name: str, start: float, end: float, **attrs) -> None:
+        """Record a span measured elsewhere, from monotonic start and end."""
+        self.spans.append(
+            {
+                "name": name,
+                "start": round(start - self._start, 4),
+                "duration": round(end - start, 4),
+                **attrs,
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        start = time.monotonic()
+        try:
+            yield attrs
+        except BaseException as err:
+            attrs["error"] = type(err).__name__
+            raise
+        finally:
+            self.add_span(name, start, time.monotonic(), **attrs)
+
+    def finish(self, outcome: str) -> None:
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        self.duration = time.monotonic() - self._start
+        _LOGGER.debug(
+            "Command trace %s (%s) %s after %.2f s",
+            self.trace_id,
+            self.source,
+            outcome,
+            self.duration,
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "source": self.source,
+            "commands": self.commands,
+            "started": self.started,
+            "outcome": self.outcome,
+            "duration": self.duration,
+            "spans": self.spans,
+        }
+
+
+# The trace of the user action being handled, if any.
+_current_trace: ContextVar[CommandTrace | None] = ContextVar(
+    "melview_command_trace", default=None
+)
+
+
+@contextmanager
+def _trace_span(name: str, **attrs):
+    """Time the enclosed block as a span of the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield attrs
+        return
+    with trace.span(name, **attrs) as span_attrs:
+        yield span_attrs
+
+
+class MelViewScheduler:
+    """Admit one account's cloud requests, commands ahead of polls.
+
+    Queued requests are served by priority, then in arrival order.
+    """
+
+    def __init__(self, limit=ACCOUNT_REQUEST_LIMIT, reserved=COMMAND_RESERVED_SLOTS):
+        self._limit = limit
+        self._reserved = reserved
+        self._active = 0
+        self._order = itertools.count()
+        # Heap of (priority, order, key, future); done futures are skipped.
+        self._waiters: list[tuple[int, int, object, asyncio.Future]] = []
+
+        self.commands_ahead = 0
+        self.promoted = 0
+
+    def _capacity(self, priority: int) -> int:
+        if priority == PRIORITY_COMMAND:
+            return self._limit
+        return self._limit - self._reserved
+
+    def _queued(self, priority: int) -> int:
+        return sum(
+            1
+            for prio, _, _, fut in self._waiters
+            if prio == priority and not fut.done()
+        )
+
+    def _queued_ahead(self, priority: int) -> bool:
+        while self._waiters and self._waiters[0][3].done():
+            heapq.heappop(self._waiters)
+        return bool(self._waiters) and self._waiters[0][0] <= priority
+
+    def _admit(self, priority: int) -> None:
+        self._active += 1
+        if priority == PRIORITY_COMMAND and self._queued(PRIORITY_POLL):
+            self.commands_ahead += 1
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, _, fut = self._waiters[0]
+            if fut.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self._active >= self._capacity(priority):
+                break
+            heapq.heappop(self._waiters)
+            self._admit(priority)
+            fut.set_result(None)
+
+    async def async_acquire(self, priority: int, key=None) -> None:
+        """Wait until a request of this priority may be sent."""
+        if self._active < self._capacity(priority) and not self._queued_ahead(
+            priority
+        ):
+            self._admit(priority)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._order), key, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Admitted just as the caller was cancelled.
+                self.release()
+            raise
+
+    def try_acquire(self, priority: int) -> bool:
+        """Take a slot only if one is free now, without queueing."""
+        if self._active < self._capacity(priority) and not self._queued_ahead(
+            priority
+        ):
+            self._admit(priority)
+            return True
+        return False
+
+    def release(self) -> None:
+        """Free a request slot for the next queued request."""
+        self._active -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def async_slot(self, priority: int, key=None):
+        """Hold a request slot for the duration of the block."""
+        await self.async_acquire(priority, key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def is_queued(self, key) -> bool:
+        """Return whether a request with this key is waiting for a slot."""
+        return any(
+            waiter_key is key and not fut.done()
+            for _, _, waiter_key, fut in self._waiters
+        )
+
+    def promote(self, key) -> bool:
+        """Move a queued poll with this key to command priority.
+
+        Returns False when no such poll is waiting, e.g. it was already sent.
+        """
+        found = False
+        for priority, _, waiter_key, fut in list(self._waiters):
+            if waiter_key is key and priority == PRIORITY_POLL and not fut.done():
+                heapq.heappush(
+                    self._waiters, (PRIORITY_COMMAND, next(self._order), key, fut)
+                )
+                found = True
+        if found:
+            self.promoted += 1
+            self._wake()
+        return found
+
+    def get_stats(self) -> dict:
+        """Return admission counters for this account."""
+        return {
+            "active": self._active,
+            "queued_commands": self._queued(PRIORITY_COMMAND),
+            "queued_polls": self._queued(PRIORITY_POLL),
+            "commands_ahead": self.commands_ahead,
+            "promoted": self.promoted,
+        }
+
+
+class RetryPolicy:
+    """Retry transient failures with exponential backoff and full jitter.
+
+    Reads are idempotent and retried on any transient failure. Commands are
+    only retried when the request cannot have been acted on: the connection
+    was never made, or the server refused it with 429 or 503.
+    """
+
+    def __init__(
+        self,
+        attempts=RETRY_ATTEMPTS,
+        base_delay=RETRY_BASE_DELAY,
+        max_delay=RETRY_MAX_DELAY,
+        budget=RETRY_BUDGET,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.retries = 0
+        self.exhausted = 0
+
+    def is_transient(self, err: Exception, idempotent: bool) -> bool:
+        """Return whether a request failing with this error may be retried."""
+        if not idempotent:
+            return isinstance(err, ClientConnectorError)
+        return isinstance(
+            err, (ClientConnectionError, ClientPayloadError, TimeoutError)
+        )
+
+    def should_retry_status(self, status: int, idempotent: bool) -> bool:
+        if idempotent:
+            return status in RETRY_STATUSES
+        return status in UNPROCESSED_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        """Return a random delay before retry number ``attempt`` (from 1)."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        )
+
+    async def async_call(self, request, idempotent=True, deadline=None):
+        """Await ``request()``, returning its (status, payload) pair.
+
+        ``deadline``, a ``time.monotonic()`` value, shortens the budget for
+        callers that must finish by then.
+
+        Each attempt is cut short when the budget runs out, so the budget
+        bounds the whole call and not just the waits between attempts. The
+        last status or error is passed on once the attempts or the budget
+        run out.
+        """
+        budget_end = time.monotonic() + self.budget
+        deadline = budget_end if deadline is None else min(deadline, budget_end)
+        attempt = 0
+        while True:
+            attempt += 1
+            error = None
+            try:
+                async with asyncio.timeout(deadline - time.monotonic()):
+                    status, payload = await request()
+            except Exception as err:
+                if not self.is_transient(err, idempotent):
+                    raise
+                error = err
+            else:
+                if not self.should_retry_status(status, idempotent):
+                    return status, payload
+
+            delay = self.backoff(attempt)
+            if attempt >= self.attempts or time.monotonic() + delay > deadline:
+                self.exhausted += 1
+                if error is not None:
+                    raise error
+                return status, payload
+            self.retries += 1
+            _LOGGER.debug(
+                "Transient failure (%s), retrying in %.2f s",
+                error if error is not None else f"status {status}",
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        return {"retries": self.retries, "exhausted": self.exhausted}
+
+
+class MelViewAuthentication:
+    """Implementation to remember and refresh MelView cookies."""
+
+    def __init__(
+        self, email, password, timeouts=None, base_url=API_URL, local_url=LOCAL_URL
+    ):
+        self._email = email
+        self._password = password
+        self._cookie = None
+        self._login_json = None
+        self._login_task: asyncio.Task | None = None
+        # Shared by every request made for this account.
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.base_url = base_url
+        self.local_url = local_url
+        self.scheduler = MelViewScheduler()
+        self.retry_policy = RetryPolicy()
+
+    def api_url(self, endpoint):
+        """Return the URL of a cloud API endpoint"""
+        return f"{self.base_url}{endpoint}.aspx"
+
+    def is_login(self):
+        """Return login status"""
+        return self._cookie is not None
+
+    async def async_login(self):
+        """Generate a new login cookie
+
+        Returns False when the credentials are rejected. A server or
+        transport failure raises a ClientError (MelViewServerError for an
+        error status) instead, as the credentials may well be valid.
+        Transient failures are retried, and concurrent callers, e.g. every
+        unit after the session expired, share a single login.
+        """
+        if self._login_task is None or self._login_task.done():
+            self._login_task = asyncio.get_running_loop().create_task(
+                self._async_login(), name="melview login"
+            )
+            # Retrieve the outcome even if every caller was cancelled.
+            self._login_task.add_done_callback(
+                lambda task: task.cancelled() or task.exception()
+            )
+        return await asyncio.shield(self._login_task)
+
+    async def _async_login(self) -> bool:
+        _LOGGER.debug("Trying to login")
+        self._cookie = None
+        self._login_json = None
+        status, cookie = await self.retry_policy.async_call(self._async_post_login)
+        if cookie is not None:
+            self._cookie = cookie
+            return True
+        if status == 200 or status in LOGIN_REJECTED_STATUSES:
+            _LOGGER.error("Login rejected (status code: %d)", status)
+            return False
+        raise MelViewServerError(f"Login failed (status code: {status})")
+
+    async def _async_post_login(self) -> tuple[int, str | None]:
+        """Post the credentials, returning the status and auth cookie."""
+        async with ClientSession(timeout=self.timeouts["login"]) as session:
+            async with session.post(
+                self.api_url("login"),
+                json={
+                    "user": self._email,
+                    "pass": self._password,
+                    "appversion": APPVERSION,
+                },
+                headers=HEADERS,
+            ) as req:
+                _LOGGER.debug("Login status code: %d", req.status)
+                _LOGGER.debug(
+                    "Login response headers:\n%s", LazyJson(dict(req.headers))
+                )
+                if req.status != 200:
+                    return req.status, None
+                # Only a successful login has a JSON body; error pages are
+                # often HTML.
+                self._login_json = await _async_read_json(req)
+                _LOGGER.debug("Login response json:\n%s", LazyJson(self._login_json))
+                cookie = req.cookies.get("auth")
+                if cookie is not None and cookie.value:
+                    return req.status, cookie.value
+                if cookie is None:
+                    _LOGGER.error("Missing auth cookie")
+                else:
+                    _LOGGER.error("Invalid auth cookie")
+                _LOGGER.error(
+                    "Login response headers:\n%s", LazyJson(dict(req.headers))
+                )
+                _LOGGER.error("Login response json:\n%s", LazyJson(self._login_json))
+                return req.status, None
+
+    def has_credentials(self, email, password):
+        """Return whether this login was made with the given credentials"""
+        return self._email == email and self._password == password
+
+    def get_cookie(self):
+        """Return authentication cookie"""
+        return {"auth": self._cookie}
+
+    def number_units(self):
+        """Return the number of units in login response."""
+        if not self._login_json:
+            return False
+        try:
+            return int(self._login_json.get("userunits", 0))
+        except Exception:
+            return False
+
+
+class MelViewLocalAdapter:
+    """Ordered command delivery to a unit's local /smart endpoint.
+
+    Local delivery only speeds commands up, as the cloud delivers them too.
+    After repeated failures a circuit breaker skips it for a cooldown, and
+    ``on_unreachable`` is called so the owner can look up the adapter's
+    address again.
+    """
+
+    def __init__(
+        self, host, queue_size=LOCAL_QUEUE_SIZE, url=LOCAL_URL, on_unreachable=None
+    ):
+        self.host = host
+        self._url = url.format(host)
+        # Command keys with the trace they belong to and when they were queued.
+        self._queue: deque[tuple[str, CommandTrace | None, float]] = deque(
+            maxlen=queue_size
+        )
+        self._session: ClientSession | None = None
+        self._worker: asyncio.Task | None = None
+        self._on_unreachable = on_unreachable
+
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.consecutive_failures = 0
+        self.last_latency: float | None = None
+        self._total_latency = 0.0
+        self._cooldown = LOCAL_BREAKER_COOLDOWN
+        self._open_until = 0.0
+
+    @property
+    def health(self) -> str:
+        """Return "healthy", "degraded" or "unreachable" (breaker open)."""
+        if self.consecutive_failures >= LOCAL_BREAKER_AFTER:
+            return "unreachable"
+        if self.consecutive_failures:
+            return "degraded"
+        return "healthy"
+
+    def _breaker_open(self) -> bool:
+        return (
+            self.consecutive_failures >= LOCAL_BREAKER_AFTER
+            and time.monotonic() < self._open_until
+        )
+
+    def enqueue(self, local_command: str, trace: CommandTrace | None = None) -> None:
+        """Queue a local command key, superseding the oldest when full."""
+        now = time.monotonic()
+        if self._breaker_open():
+            self.skipped += 1
+            _LOGGER.debug("Adapter %s unreachable, skipping local delivery", self.host)
+            if trace is not None:
+                trace.add_span("local_delivery", now, now, result="skipped")
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            _LOGGER.debug("Local queue for %s full, dropping oldest", self.host)
+            _, dropped_trace, queued = self._queue[0]
+            if dropped_trace is not None:
+                dropped_trace.add_span("local_delivery", queued, now, result="dropped")
+        self._queue.append((local_command, trace, now))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.get_running_loop().create_task(
+                self._async_run(), name=f"melview local {self.host}"
+            )
+
+    async def _async_run(self) -> None:
+        """Deliver queued commands one at a time, in order."""
+        while self._queue:
+            if self._breaker_open():
+                self.skipped += len(self._queue)
+                now = time.monotonic()
+                for _, trace, queued in self._queue:
+                    if trace is not None:
+                        trace.add_span("local_delivery", queued, now, result="skipped")
+                self._queue.clear()
+                return
+            local_command, trace, queued = self._queue.popleft()
+            delivered = await self._async_deliver(local_command)
+            if trace is not None:
+                trace.add_span(
+                    "local_delivery",
+                    queued,
+                    time.monotonic(),
+                    result="delivered" if delivered else "failed",
+                )
+
+    async def _async_deliver(self, local_command: str) -> bool:
+        if self._session is None or self._session.closed:
+            # A single pooled connection is kept alive between commands.
+            self._session = ClientSession(
+                connector=TCPConnector(limit=1), timeout=LOCAL_TIMEOUT
+            )
+        start = time.monotonic()
+        try:
+            async with self._session.post(
+                self._url,
+                data=LOCAL_DATA.format(local_command),
+            ) as req:
+                await req.read()
+                if req.status == 200:
+                    _LOGGER.debug("Command sent locally")
+                    self._record_delivery(time.monotonic() - start)
+                    return True
+                _LOGGER.error("Local command failed (status %d)", req.status)
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            _LOGGER.warning("Local command delivery failed: %s", err)
+        self._record_failure()
+        return False
+
+    def _record_delivery(self, latency: float) -> None:
+        self.delivered += 1
+        self.last_latency = latency
+        self._total_latency += latency
+        if self.consecutive_failures >= LOCAL_BREAKER_AFTER:
+            _LOGGER.info("Adapter %s reachable again", self.host)
+        self.consecutive_failures = 0
+        self._cooldown = LOCAL_BREAKER_COOLDOWN
+
+    def _record_failure(self) -> None:
+        self.failed += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures < LOCAL_BREAKER_AFTER:
+            return
+        if self.consecutive_failures > LOCAL_BREAKER_AFTER:
+            # The delivery after a cooldown failed as well.
+            self._cooldown = min(self._cooldown * 2, LOCAL_BREAKER_MAX_COOLDOWN)
+        else:
+            _LOGGER.warning(
+                "Adapter %s unreachable, sending commands through the cloud only",
+                self.host,
+            )
+        self._open_until = time.monotonic() + self._cooldown
+        if self._on_unreachable is not None:
+            self._on_unreachable()
+
+    def get_stats(self) -> dict:
+        """Return delivery counters for this adapter."""
+        return {
+            "host": self.host,
+            "queued": len(self._queue),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "health": self.health,
+            "consecutive_failures": self.consecutive_failures,
+            "breaker_remaining": max(self._open_until - time.monotonic(), 0.0),
+            "last_latency": self.last_latency,
+            "mean_latency": (
+                self._total_latency / self.delivered if self.delivered else None
+            ),
+        }
+
+    async def async_close(self) -> None:
+        """Cancel pending deliveries and close the adapter connection."""
+        self._queue.clear()
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class MelViewZone:
+    def __init__(self, id, name, status):
+        self.id = id
+        self.name = name
+        self.status = status
+
+
+class MelViewDevice:
+    """Handler class for a MelView unit"""
+
+    def __init__(
+        self,
+        deviceid,
+        buildingid,
+        friendlyname,
+        authentication,
+        localcontrol=False,
+        buildingname=None,
+        hedged_reads=False,
+        freshness=STATE_FRESHNESS,
+    ):
+        self._deviceid = deviceid
+        self._buildingid = buildingid
+        self._buildingname = buildingname
+        self._friendlyname = friendlyname
+        self._authentication = authentication
+
+        self._caps: UnitCaps | None = None
+        self._last_caps_time_s = 0.0
+        # Seconds the cached state counts as fresh; shared with the poll
+        # interval, so there is a single notion of state age.
+        self.freshness = freshness
+        # Called instead of a plain state read to revalidate stale state, so
+        # the owner (e.g. a coordinator) sees the result.
+        self.revalidate_handler = None
+        self._info_task: asyncio.Task | None = None
+        self._revalidate_task: asyncio.Task | None = None
+        self._caps_task: asyncio.Task | None = None
+        self._close_task: asyncio.Task | None = None
+        self._json: UnitState | None = None
+        self._last_info_time_s = 0.0
+        # Bumped by every invalidation; reads remember the value they saw.
+        self._info_generation = 0
+        self._info_latencies: deque[float] = deque(maxlen=HEDGE_SAMPLES)
+        self._hedged_reads = hedged_reads
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self.commands_in_flight = 0
+        self.polls_merged = 0
+        self.commands_superseded = 0
+        self.reflect_delay = CONFIRM_DEFAULT_DELAY
+        self.confirmations = 0
+        self.confirmations_abandoned = 0
+        self._expected: dict | None = None
+        self._expected_since = 0.0
+        self._expected_misses = 0
+        self._command_generations: dict[str, int] = {}
+        self._command_locks: dict[str, asyncio.Lock] = {}
+        self._confirm_pending = False
+        # State reads sent before this would likely not show the last command.
+        self._reads_held_until = 0.0
+        self.traces: deque[CommandTrace] = deque(maxlen=COMMAND_TRACES)
+        # Traces of sent commands, waiting for a state read to show them and
+        # then for that state to be written.
+        self._awaiting_traces: list[CommandTrace] = []
+        self._reflected_traces: list[CommandTrace] = []
+        self.command_latencies: deque[float] = deque(maxlen=COMMAND_LATENCY_SAMPLES)
+        self.recent_states: deque[tuple[float, dict]] = deque(maxlen=RECENT_STATES)
+        self._localip = localcontrol
+        self._local: MelViewLocalAdapter | None = None
+        self._standby = 0
+        self._zones = {}
+
+        self.fan = FANSTAGES[3]
+        self.halfdeg = False
+        self.model = None
+        self.temp_ranges = {}
+        self.has_vertical_vane = False
+        self.has_horizontal_vane = False
+        self.has_swing = False
+        self.has_auto_vane = False
+        self.vertical_vane_keyed = {}
+        self.horizontal_vane_keyed = {}
+
+    async def async_refresh(self):
+        await self.async_refresh_device_caps()
+        await self.async_refresh_device_info()
+
+    def __str__(self):
+        return str(self._json)
+
+    def apply_caps(self, caps: UnitCaps):
+        """Derive fan stages, temperature ranges and vanes from capabilities"""
+        self._caps = caps
+        self._last_caps_time_s = time.time()
+        if self._localip and "localip" in self._caps:
+            self._localip = self._caps["localip"]
+        if self._caps["fanstage"]:
+            self.fan = dict(FANSTAGES[self._caps["fanstage"]])
+        if "hasautofan" in self._caps and self._caps["hasautofan"] == 1:
+            self.fan[0] = "auto"
+        self.fan_keyed = {value: key for key, value in self.fan.items()}
+        if "max" in self._caps:
+            for hvac_mode, mode_id in MODE.items():
+                caps_range = self._caps["max"].get(str(mode_id))
+                if caps_range and "min" in caps_range and "max" in caps_range:
+                    self.temp_ranges[hvac_mode] = {
+                        "min": caps_range["min"],
+                        "max": caps_range["max"],
+                    }
+                    if hvac_mode == MelViewMode.COOL:
+                        self.temp_ranges[MelViewMode.DRY] = dict(
+                            self.temp_ranges[MelViewMode.COOL]
+                        )
+        if "modelname" in self._caps:
+            self.model = self._caps["modelname"]
+        if "halfdeg" in self._caps and self._caps["halfdeg"] == 1:
+            self.halfdeg = True
+
+        # Vane capabilities
+        self.has_vertical_vane = self._caps.get("hasairdir", 0) == 1
+        self.has_horizontal_vane = self._caps.get("hasairdirh", 0) == 1
+        self.has_swing = self._caps.get("hasswing", 0) == 1
+        self.has_auto_vane = self._caps.get("hasairauto", 0) == 1
+
+        # Create reverse lookups for vane positions
+        if self.has_vertical_vane:
+            self.vertical_vane_keyed = {v: k for k, v in VERTICAL_VANE.items()}
+        if self.has_horizontal_vane:
+            self.horizontal_vane_keyed = {v: k for k, v in HORIZONTAL_VANE.items()}
+
+        if "error" in self._caps:
+            if self._caps["error"] != "ok":
+                _LOGGER.warning(
+                    "%s unit capabilities error: %s, attempting to continue",
+                    self.get_friendly_name(),
+                    self._caps["error"],
+                )
+        if "fault" in self._caps:
+            if self._caps["fault"] != "":
+                _LOGGER.warning(
+                    "%s unit capabilities fault: %s, attempting to continue",
+                    self.get_friendly_name(),
+                    self._caps["fault"],
+                )
+
+    async def _async_read_caps(self) -> tuple[int, UnitCaps | None]:
+        """Request the unit capabilities, returning the status and payload."""
+        async with self._authentication.scheduler.async_slot(
+            PRIORITY_POLL
+        ), ClientSession(timeout=self._authentication.timeouts["caps"]) as session:
+            async with session.post(
+                self._authentication.api_url("unitcapabilities"),
+                cookies=self._authentication.get_cookie(),
+                json={"unitid": self._deviceid, "v": APIVERSION},
+            ) as resp:
+                if resp.status == 200:
+                    return resp.status, await _async_read_json(resp)
+                return resp.status, None
+
+    async def async_refresh_device_caps(self, retry=True, deadline=None):
+        status, caps = await self._authentication.retry_policy.async_call(
+            self._async_read_caps, deadline=deadline
+        )
+        if status == 200:
+            self.apply_caps(caps)
+            return True
+        if status == 401 and retry:
+            _LOGGER.error("Unit capabilities error 401 (trying to re-login)")
+            if await self._authentication.async_login():
+                return await self.async_refresh_device_caps(False, deadline)
+        else:
+            _LOGGER.error(
+                "Unable to retrieve unit capabilities (Invalid status code: %d)",
+                status,
+            )
+        return False
+
+    async def async_refresh_device_info(
+        self,
+        retry=True,
+        max_age=INFO_COALESCE_SECONDS,
+        priority=PRIORITY_POLL,
+        deadline=None,
+    ):
+        """Refresh unit state, sharing one request between concurrent callers.
+
+        Callers arriving while a read is in flight await that read, and
+        state read less than ``max_age`` seconds ago is reused as is. A
+        command-priority caller moves a still queued read ahead of polls.
+        A read started by this call, retries included, gives up by
+        ``deadline`` (a ``time.monotonic()`` value).
+        """
+        if (
+            self._info_task is None
+            and self._json is not None
+            and (time.time() - self._last_info_time_s) < max_age
+        ):
+            return True
+
+        if self._info_task is None:
+            if self._confirm_pending:
+                # Confirmation reads after a command go ahead of polls.
+                self._confirm_pending = False
+                priority = PRIORITY_COMMAND
+            task = asyncio.ensure_future(
+                self._async_fetch_device_info(retry, priority, deadline)
+            )
+            task.add_done_callback(self._async_info_task_done)
+            self._info_task = task
+        elif priority == PRIORITY_COMMAND:
+            self._authentication.scheduler.promote(self._info_task)
+        return await asyncio.shield(self._info_task)
+
+    async def async_confirm_state(self, deadline=None):
+        """Read the state to confirm the last command, ahead of polls.
+
+        Always goes to the server: state cached from before the command,
+        however recent, cannot confirm it.
+        """
+        return await self.async_refresh_device_info(
+            max_age=0, priority=PRIORITY_COMMAND, deadline=deadline
+        )
+
+    def _async_info_task_done(self, task: asyncio.Task) -> None:
+        """Release the shared state read once it has finished."""
+        if self._info_task is task:
+            self._info_task = None
+        if not task.cancelled():
+            # Retrieved here so an unawaited failure is not logged by asyncio.
+            task.exception()
+
+    def _invalidate_info(self) -> None:
+        """Make the next state read hit the server.
+
+        Used after a command so an older in-flight read is not shared with
+        callers expecting the post-command state. Reads are held back until
+        the unit usually shows a command, as an earlier one would only
+        return the old state. A read still queued behind other requests has
+        not been sent, so it is kept and held too rather than reading the
+        unit twice.
+        """
+        self._reads_held_until = time.monotonic() + self.reflect_delay
+        if self._info_task is not None and self._authentication.scheduler.is_queued(
+            self._info_task
+        ):
+            self.polls_merged += 1
+        else:
+            self._info_task = None
+            self._confirm_pending = True
+        # A read already on the wire predates the command and must not make
+        # its state count as fresh again. The cache keeps its age: whether
+        # the command is confirmed is tracked apart from how old the state is.
+        self._info_generation += 1
+
+    async def _async_read_state(self) -> tuple[int, UnitState | None]:
+        """Request the unit state, returning the status code and payload."""
+        async with ClientSession(
+            timeout=self._authentication.timeouts["state"]
+        ) as session:
+            async with session.post(
+                self._authentication.api_url("unitcommand"),
+                cookies=self._authentication.get_cookie(),
+                json={"unitid": self._deviceid, "v": APIVERSION},
+            ) as resp:
+                if resp.status == 200:
+                    return resp.status, await _async_read_json(resp)
+                return resp.status, None
+
+    def _hedge_delay(self) -> float:
+        """Return the delay before a hedged read fires its second request."""
+        if len(self._info_latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        latencies = sorted(self._info_latencies)
+        return latencies[int(HEDGE_PERCENTILE * (len(latencies) - 1))]
+
+    async def _async_read_state_hedged(self):
+        """Read the state, racing a second request if the first is slow.
+
+        The second request runs on its own connection once the first has
+        taken longer than the usual read. The first good answer wins and the
+        other request is cancelled. The second request needs a poll slot of
+        its own and is skipped when none is free, so hedging never exceeds
+        the account's request limit.
+        """
+        primary = asyncio.ensure_future(self._async_read_state())
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay())
+            if not done and not self._authentication.scheduler.try_acquire(
+                PRIORITY_POLL
+            ):
+                self.hedges_skipped += 1
+                return await primary
+            if not done:
+                self.hedges_fired += 1
+                hedge = asyncio.ensure_future(self._async_read_state())
+                # Released however the hedge ends, even if cancelled unstarted.
+                hedge.add_done_callback(
+                    lambda _: self._authentication.scheduler.release()
+                )
+                tasks.add(hedge)
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None and task.result()[0] == 200:
+                            if task is hedge:
+                                self.hedges_won += 1
+                            return task.result()
+            # Neither request returned a payload, report the original one.
+            return primary.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _async_fetch_device_info(
+        self, retry=True, priority=PRIORITY_POLL, deadline=None
+    ):
+        # The cached state is kept until the new one arrives, so it can still
+        # be served while this read is in flight or if it fails.
+        info_task = asyncio.current_task()
+        read_time = time.time()
+        start = time.monotonic()
+        generation = self._info_generation
+
+        async def _async_attempt():
+            nonlocal read_time, start, generation, priority
+            while True:
+                while (hold := self._reads_held_until - time.monotonic()) > 0:
+                    # Now the command's confirmation read, so it goes ahead
+                    # of polls once the hold is over.
+                    priority = PRIORITY_COMMAND
+                    await asyncio.sleep(hold)
+                # Keyed by this task so a command can find and promote the
+                # read while it is queued.
+                async with self._authentication.scheduler.async_slot(
+                    priority, info_task
+                ):
+                    if self._reads_held_until > time.monotonic():
+                        # A command was accepted while this read was queued.
+                        continue
+                    read_time = time.time()
+                    start = time.monotonic()
+                    generation = self._info_generation
+                    if self._hedged_reads:
+                        return await self._async_read_state_hedged()
+                    return await self._async_read_state()
+
+        status, payload = await self._authentication.retry_policy.async_call(
+            _async_attempt, deadline=deadline
+        )
+        latency = time.monotonic() - start
+
+        if status == 200:
+            self._info_latencies.append(latency)
+            self._json = payload
+            if generation == self._info_generation:
+                self._last_info_time_s = read_time
+                self._check_expected(payload, start)
+            else:
+                # Sent before a command was accepted: newer than the cache,
+                # but neither fresh nor evidence about the command.
+                _LOGGER.debug("State read predates the last command")
+            self.recent_states.append((read_time, payload))
+
+            fault = self._json["fault"]
+            error = self._json["error"]
+            if fault == "COMM":
+                self._last_info_time_s = 0.0
+                raise MelViewCommError(
+                    "Unit is not communicating with the MelView server (COMM fault). "
+                    "Check the adapter is connected to Wi-Fi with an internet connection. "
+                    "For further troubleshooting, refer to the Mitsubishi Electric "
+                    "Wi-Fi Control adapter User Manual."
+                )
+            if fault != "":
+                _LOGGER.warning(
+                    "Unit %s fault: %s",
+                    self.get_friendly_name(),
+                    fault,
+                )
+            if error != "ok":
+                _LOGGER.warning(
+                    "Unit %s error: %s"
+                    "Unexpected value: please raise an Issue in the GitHub repository:"
+                    "https://github.com/jz-v/ha-melview/issues)",
+                    self.get_friendly_name(),
+                    error,
+                )
+
+            self._apply_state()
+            return True
+        if status == 401 and retry:
+            _LOGGER.error("Info error 401 (trying to re-login)")
+            if await self._authentication.async_login():
+                return await self._async_fetch_device_info(False, priority, deadline)
+        else:
+            _LOGGER.error("Unable to retrieve info (invalid status code: %d)", status)
+        return False
+
+    def _apply_state(self):
+        """Update zones and standby from the current state payload"""
+        if "zones" in self._json:
+            self._zones = {
+                z["zoneid"]: MelViewZone(z["zoneid"], z["name"], z["status"])
+                for z in self._json["zones"]
+            }
+        if "standby" in self._json:
+            self._standby = self._json["standby"]
+
+    def restore(self, caps: UnitCaps, state: UnitState, timestamp: float):
+        """Load capabilities and state saved by a previous run"""
+        self.apply_caps(caps)
+        self._last_caps_time_s = timestamp
+        self._json = state
+        self._last_info_time_s = timestamp
+        self._apply_state()
+
+    def get_snapshot(self) -> UnitSnapshot | None:
+        """Return what restore() needs to rebuild this unit without the cloud"""
+        if self._caps is None or self._json is None:
+            return None
+        return {
+            "unitid": self._deviceid,
+            "buildingid": self._buildingid,
+            "building": self._buildingname,
+            "room": self._friendlyname,
+            "caps": self._caps,
+            "state": self._json,
+            "time": self._last_info_time_s,
+        }
+
+    async def async_is_info_valid(self, priority=PRIORITY_POLL):
+        """Ensure unit info is cached, revalidating stale info in the background.
+
+        Only a unit with no cached state waits for a read; stale state is
+        served at once while a revalidation runs. No revalidation is started
+        while a command awaits confirmation, as its confirmation read is due.
+        """
+        if self._json is not None:
+            if (
+                time.time() - self._last_info_time_s
+            ) >= self.freshness and not self.awaiting_confirmation:
+                self._schedule_revalidation()
+            return True
+        try:
+            with _trace_span("pre_read"):
+                return await self.async_refresh_device_info(priority=priority)
+        except ConnectionError as err:
+            _LOGGER.debug("Info refresh failed: %s", err)
+            return False
+
+    def _schedule_revalidation(self) -> None:
+        """Start a background state read unless one is already running."""
+        if self._info_task is not None or (
+            self._revalidate_task is not None and not self._revalidate_task.done()
+        ):
+            return
+        _LOGGER.debug("Current settings out of date, revalidating")
+        if self.revalidate_handler is not None:
+            coro = self.revalidate_handler()
+        else:
+            coro = self.async_refresh_device_info()
+        self._revalidate_task = asyncio.get_running_loop().create_task(
+            coro, name=f"melview revalidate {self._deviceid}"
+        )
+        self._revalidate_task.add_done_callback(self._async_revalidate_done)
+
+    def _async_revalidate_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.debug("Revalidation failed: %s", task.exception())
+
+    async def async_is_caps_valid(self):
+        if self._caps is None:
+            return await self.async_refresh_device_caps()
+
+        return True
+
+    def _get_local_adapter(self) -> MelViewLocalAdapter:
+        """Return the delivery queue for the current local IP."""
+        if self._local is None or self._local.host != self._localip:
+            if self._local is not None:
+                self._close_task = asyncio.get_running_loop().create_task(
+                    self._local.async_close(),
+                    name=f"melview close adapter {self._deviceid}",
+                )
+                self._close_task.add_done_callback(self._async_close_done)
+            self._local = MelViewLocalAdapter(
+                self._localip,
+                url=self._authentication.local_url,
+                on_unreachable=self._schedule_localip_refresh,
+            )
+        return self._local
+
+    def _async_close_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.debug("Closing the old adapter failed: %s", task.exception())
+
+    def _schedule_localip_refresh(self) -> None:
+        """Re-read the capabilities in case DHCP gave the adapter a new IP."""
+        if self._caps_task is not None and not self._caps_task.done():
+            return
+        self._caps_task = asyncio.get_running_loop().create_task(
+            self._async_refresh_localip(), name=f"melview localip {self._deviceid}"
+        )
+
+    async def _async_refresh_localip(self) -> None:
+        previous = self._localip
+        try:
+            await self.async_refresh_device_caps()
+        except Exception as err:
+            _LOGGER.debug("Capabilities refresh for local IP failed: %s", err)
+            return
+        if self._localip != previous:
+            _LOGGER.info(
+                "Adapter of %s moved from %s to %s",
+                self.get_friendly_name(),
+                previous,
+                self._localip,
+            )
+
+    def get_cache_ages(self) -> dict:
+        """Return how old the cached capabilities and state are, in seconds."""
+        now = time.time()
+        return {
+            "caps": now - self._last_caps_time_s if self._caps is not None else None,
+            "state": now - self._last_info_time_s if self._json is not None else None,
+        }
+
+    def get_local_stats(self) -> dict | None:
+        """Return local delivery counters, if local control is in use."""
+        if self._local is None:
+            return None
+        return self._local.get_stats()
+
+    async def async_close(self) -> None:
+        """Stop local delivery and background reads for this unit."""
+        for task in (self._caps_task, self._revalidate_task):
+            if task is not None and not task.done():
+                task.cancel()
+        if self._close_task is not None:
+            # Let the previous adapter finish closing its connection.
+            await asyncio.wait([self._close_task])
+            self._close_task = None
+        if self._local is not None:
+            await self._local.async_close()
+            self._local = None
+
+    async def async_send_command(self, command, retry=True):
+        self.commands_in_flight += 1
+        try:
+            code = command[:2]
+            if "," not in command and code in SUPERSEDABLE_COMMANDS:
+                return await self._async_send_latest(code, command, retry)
+            return await self._async_send_command(command, retry)
+        finally:
+            self.commands_in_flight -= 1
+
+    async def _async_send_latest(self, code, command, retry=True):
+        """Send a command unless a newer one with the same code has arrived.
+
+        Commands with the same code are sent one at a time, in order. Those
+        overtaken while waiting are dropped, and one overtaken while in
+        flight reports False so only the latest triggers a refresh.
+        """
+        generation = self._command_generations.get(code, 0) + 1
+        self._command_generations[code] = generation
+        lock = self._command_locks.setdefault(code, asyncio.Lock())
+        trace = _current_trace.get()
+        with _trace_span("queued"):
+            await lock.acquire()
+        try:
+            if self._command_generations[code] != generation:
+                _LOGGER.debug("Command %s superseded before sending", command)
+                self.commands_superseded += 1
+                self._supersede_trace(trace)
+                return False
+            sent = await self._async_send_command(command, retry)
+        finally:
+            lock.release()
+        if sent and self._command_generations[code] != generation:
+            _LOGGER.debug("Command %s superseded while in flight", command)
+            self.commands_superseded += 1
+            self._supersede_trace(trace)
+            return False
+        return sent
+
+    def _supersede_trace(self, trace: CommandTrace | None) -> None:
+        if trace is None:
+            return
+        if trace in self._awaiting_traces:
+            self._awaiting_traces.remove(trace)
+        trace.finish("superseded")
+
+    async def _async_send_command(self, command, retry=True):
+        _LOGGER.debug("Command issued: %s", command)
+
+        if not await self.async_is_info_valid(PRIORITY_COMMAND):
+            _LOGGER.error("Data outdated, command %s failed", command)
+            return False
+
+        with _trace_span("cloud_post", command=command) as span:
+            status, data = await self._authentication.retry_policy.async_call(
+                partial(self._async_post_command, command), idempotent=False
+            )
+            span["status"] = status
+        if status == 200:
+            _LOGGER.debug("Command response: %s", data)
+            if self._localip:
+                if "lc" in data:
+                    self._get_local_adapter().enqueue(
+                        data["lc"], _current_trace.get()
+                    )
+                else:
+                    _LOGGER.error("Missing local command key")
+                    _LOGGER.debug("Full command response (no lc key): %s", data)
+
+            return True
+        if status == 401 and retry:
+            _LOGGER.error("Command send error 401 (trying to relogin)")
+            if await self._authentication.async_login():
+                return await self._async_send_command(command, retry=False)
+        else:
+            _LOGGER.error("Unable to send command (invalid status code: %d)", status)
+
+        return False
+
+    async def _async_post_command(
+        self, command
+    ) -> tuple[int, CommandResponse | None]:
+        """Post a command, returning the status and response payload."""
+        async with self._authentication.scheduler.async_slot(
+            PRIORITY_COMMAND
+        ), ClientSession(timeout=self._authentication.timeouts["command"]) as session:
+            async with session.post(
+                self._authentication.api_url("unitcommand"),
+                cookies=self._authentication.get_cookie(),
+                json={
+                    "unitid": self._deviceid,
+                    "v": APIVERSION,
+                    "commands": command,
+                    "lc": 1,
+                },
+            ) as resp:
+                if resp.status != 200:
+                    return resp.status, None
+                _LOGGER.debug("Command sent to server")
+                self._invalidate_info()
+                self._expect(command)
+                self._trace_sent(command)
+                return resp.status, await _async_read_json(resp)
+
+    def _expect(self, command):
+        """Remember what the state should show once the command is applied"""
+        expected = expected_state(command)
+        if self._expected is not None:
+            zones = {**self._expected.get("zones", {}), **expected.get("zones", {})}
+            expected = {**self._expected, **expected}
+            if zones:
+                expected["zones"] = zones
+        self._expected = expected
+        self._expected_since = time.monotonic()
+        self._expected_misses = 0
+
+    def _trace_sent(self, command):
+        """Mark the current trace as waiting for its command to show"""
+        trace = _current_trace.get()
+        if trace is None:
+            return
+        trace.commands.append(command)
+        trace.sent_at = time.monotonic()
+        if trace not in self._awaiting_traces:
+            self._awaiting_traces.append(trace)
+
+    def _check_expected(self, payload, read_start):
+        """Learn the reflect delay from the first read showing the command"""
+        if self._expected is None:
+            return
+        if not state_matches(payload, self._expected):
+            self._expected_misses += 1
+            return
+        now = time.monotonic()
+        for trace in self._awaiting_traces:
+            trace.add_span(
+                "confirmation", trace.sent_at, now, reads=self._expected_misses + 1
+            )
+            trace.reflected_at = now
+        self._reflected_traces.extend(self._awaiting_traces)
+        self._awaiting_traces.clear()
+        sample = read_start - self._expected_since
+        self._expected = None
+        self.confirmations += 1
+        if sample < 0:
+            # The read was already queued before the command was accepted.
+            return
+        if not self._expected_misses:
+            sample *= CONFIRM_SHRINK
+        delay = self.reflect_delay + CONFIRM_SMOOTHING * (sample - self.reflect_delay)
+        self.reflect_delay = min(max(delay, CONFIRM_MIN_DELAY), CONFIRM_MAX_DELAY)
+
+    @property
+    def awaiting_confirmation(self) -> bool:
+        """Return whether the last command is not yet shown by a state read"""
+        return self._expected is not None
+
+    def abandon_confirmation(self):
+        """Stop waiting for the last command, allowing more time next time"""
+        if self._expected is None:
+            return
+        self._expected = None
+        self.confirmations_abandoned += 1
+        self.reflect_delay = min(self.reflect_delay * 2, CONFIRM_MAX_DELAY)
+        for trace in self._awaiting_traces:
+            trace.finish("unconfirmed")
+        self._awaiting_traces.clear()
+
+    @contextmanager
+    def trace_command(self, source: str):
+        """Trace the commands sent while handling one user action.
+
+        Nested calls join the trace already in progress. A trace whose
+        command was accepted stays open until a state read shows it and
+        ``finish_traces`` is called once that state has been written.
+        """
+        if _current_trace.get() is not None:
+            yield _current_trace.get()
+            return
+        trace = CommandTrace(source)
+        self.traces.append(trace)
+        token = _current_trace.set(trace)
+        try:
+            with trace.span("setter"):
+                yield trace
+        finally:
+            _current_trace.reset(token)
+            if trace.sent_at is None:
+                trace.finish("failed")
+
+    def finish_traces(self) -> bool:
+        """Complete the traces whose commands the last written state shows.
+
+        Returns whether any trace was completed.
+        """
+        if not self._reflected_traces:
+            return False
+        now = time.monotonic()
+        for trace in self._reflected_traces:
+            trace.add_span("state_write", trace.reflected_at, now)
+            trace.finish("confirmed")
+            self.command_latencies.append(trace.duration)
+        self._reflected_traces.clear()
+        return True
+
+    def get_command_latency(self) -> dict | None:
+        """Return statistics of recent confirmed command latencies"""
+        if not self.command_latencies:
+            return None
+        ordered = sorted(self.command_latencies)
+        return {
+            "mean": sum(ordered) / len(ordered),
+            "median": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+            "count": len(ordered),
+        }
+
+    async def async_send_commands(self, commands):
+        """Send several commands in a single request."""
+        return await self.async_send_command(",".join(commands))
+
+    def get_state_commands(
+        self, power=None, mode=None, temperature=None, fan_speed=None
+    ) -> list[str]:
+        """Return the commands that bring the unit to the requested state.
+
+        Raises ValueError when part of the state is not supported by the unit.
+        """
+        if power is False:
+            return ["PW0"]
+
+        commands = []
+        if power or mode is not None or fan_speed is not None:
+            commands.append("PW1")
+        if mode is not None:
+            if mode not in MODE:
+                raise ValueError(f"Mode {mode} not supported")
+            commands.append(f"MD{MODE[mode]}")
+        if temperature is not None:
+            if mode is None and self._json is not None:
+                mode = next(
+                    (key for key, val in MODE.items() if val == self._json["setmode"]),
+                    None,
+                )
+            temp_range = self.temp_ranges.get(mode)
+            if temp_range and not (
+                temp_range["min"] <= temperature <= temp_range["max"]
+            ):
+                raise ValueError(
+                    f"Temperature {temperature} outside {temp_range['min']}"
+                    f"-{temp_range['max']} for mode {mode}"
+                )
+            commands.append("TS{:.2f}".format(temperature))
+        if fan_speed is not None:
+            if fan_speed not in self.fan_keyed:
+                raise ValueError(f"Fan speed {fan_speed} not supported")
+            commands.append("FS{:.2f}".format(self.fan_keyed[fan_speed]))
+        return commands
+
+    async def async_force_update(self):
+        """Force info refresh"""
+        return await self.async_refresh_device_info(max_age=0)
+
+    def get_id(self):
+        """Get device ID"""
+        return self._deviceid
+
+    def get_friendly_name(self):
+        """Get customised device name"""
+        return self._friendlyname
+
+    def get_building_id(self):
+        """Get the ID of the building the unit belongs to"""
+        return self._buildingid
+
+    def get_building_name(self):
+        """Get the name of the building the unit belongs to"""
+        return self._buildingname or f"Building {self._buildingid}"
+
+    async def async_get_precision_halves(self) -> bool:
+        """Get unit support for half-degree steps"""
+        if not await self.async_is_caps_valid():
+            return False
+
+        return self._caps.get("halfdeg") == 1
+
+    async def async_get_temperature(self):
+        """Get set temperature"""
+        if not await self.async_is_info_valid():
+            return 0
+
+        return float(self._json["settemp"])
+
+    async def async_get_room_temperature(self):
+        """Get current room temperature"""
+        if not await self.async_is_info_valid():
+            return 0
+        return self._json.get("roomtemp", 0)
+
+    def get_outside_temperature(self):
+        """Get current outside temperature"""
+        if "hasoutdoortemp" not in self._caps or self._caps["hasoutdoortemp"] == 0:
+            _LOGGER.error("Outdoor temperature not supported")
+            return 0
+        return self._json.get("outdoortemp", 0)
+
+    def get_unit_type(self):
+        """Return the unit type from capabilities if available."""
+        if self._caps is None:
+            return None
+        return self._caps.get("unittype")
+
+    async def async_get_speed(self):
+        """Get the set fan speed"""
+        if not await self.async_is_info_valid():
+            return "auto"
+
+        for key, val in self.fan_keyed.items():
+            if self._json["setfan"] == val:
+                return key
+
+        return "auto"
+
+    async def async_get_mode(self):
+        """Get the set mode"""
+        if not await self.async_is_info_valid():
+            return MelViewMode.AUTO
+
+        if await self.async_is_power_on():
+            for key, val in MODE.items():
+                if self._json["setmode"] == val:
+                    return key
+
+        return MelViewMode.AUTO
+
+    def get_zone(self, zoneid):
+        return self._zones.get(zoneid)
+
+    def get_zones(self):
+        return self._zones.values()
+
+    async def async_is_power_on(self):
+        """Check unit is on"""
+        if not await self.async_is_info_valid():
+            return False
+
+        return self._json["power"]
+
+    async def async_set_temperature(self, temperature):
+        """Set the target temperature"""
+        mode = await self.async_get_mode()
+        temp_range = self.temp_ranges.get(mode)
+        if not temp_range:
+            _LOGGER.warning("No temperature range available for mode %s", mode.value)
+            return await self.async_send_command("TS{:.2f}".format(temperature))
+        min_temp = temp_range["min"]
+        max_temp = temp_range["max"]
+        if temperature < min_temp:
+            _LOGGER.error(
+                "Temperature %.1f lower than min %d for mode %s",
+                temperature,
+                min_temp,
+                mode,
+            )
+            return False
+        if temperature > max_temp:
+            _LOGGER.error(
+                "Temperature %.1f greater than max %d for mode %s",
+                temperature,
+                max_temp,
+                mode,
+            )
+            return False
+        return await self.async_send_command("TS{:.2f}".format(temperature))
+
+    async def async_set_speed(self, speed):
+        """Set the fan speed by label (fan stage name)."""
+        if not await self.async_is_power_on():
+            if not await self.async_power_on():
+                return False
+        if speed not in self.fan_keyed.keys():
+            _LOGGER.error("Fan speed %d not supported", speed)
+            return False
+        return await self.async_send_command("FS{:.2f}".format(self.fan_keyed[speed]))
+
+    async def async_set_speed_code(self, speed_code):
+        """Set the fan speed by code (fan stage integer)."""
+        if not await self.async_is_power_on():
+            if not await self.async_power_on():
+                return False
+        if speed_code not in self.fan.keys():
+            _LOGGER.error("Fan speed code %d not supported", speed_code)
+            return False
+        return await self.async_send_command("FS{:.2f}".format(speed_code))
+
+    async def async_set_mode(self, mode):
+        """Set operating mode"""
+        if not await self.async_is_power_on():
+            if not await self.async_power_on():
+                return False
+
+        if mode not in MODE:
+            _LOGGER.error("Mode %s not supported", mode)
+            return False
+
+        return await self.async_send_command(f"MD{MODE[mode]}")
+
+    async def async_enable_zone(self, zoneid):
+        """Turn on a zone"""
+        return await self.async_send_command(f"Z{zoneid}1")
+
+    async def async_disable_zone(self, zoneid):
+        """Turn off a zone"""
+        return await self.async_send_command(f"Z{zoneid}0")
+
+    async def async_set_zones(self, zones):
+        """Turn several zones on or off in a single command.
+
+        ``zones`` maps zone IDs to whether the zone should be on.
+        """
+        if not zones:
+            return False
+        return await self.async_send_commands(
+            [f"Z{zoneid}{1 if on else 0}" for zoneid, on in zones.items()]
+        )
+
+    async def async_power_on(self):
+        """Turn on the unit"""
+        return await self.async_send_command("PW1")
+
+    async def async_power_off(self):
+        """Turn off the unit"""
+        return await self.async_send_command("PW0")
+
+    async def async_set_lossnay_preset(self, preset_name: str) -> bool:
+        """Set Lossnay ERV preset mode."""
+        code = LOSSNAY_PRESETS.get(preset_name)
+        if code is None:
+            _LOGGER.error("Unknown Lossnay preset: %s", preset_name)
+            return False
+        return await self.async_send_command(f"MD{code}")
+
+    async def async_set_vertical_vane(self, position_label: str) -> bool:
+        """Set vertical vane position by label."""
+        if not await self.async_is_power_on():
+            if not await self.async_power_on():
+                return False
+
+        code = self.vertical_vane_keyed.get(position_label)
+        if code is None:
+            _LOGGER.error("Vertical vane position %s not supported", position_label)
+            return False
+
+        return await self.async_send_command(f"AV{code}")
+
+    async def async_set_horizontal_vane(self, position_label: str) -> bool:
+        """Set horizontal vane position by label."""
+        if not await self.async_is_power_on():
+            if not await self.async_power_on():
+                return False
+
+        code = self.horizontal_vane_keyed.get(position_label)
+        if code is None:
+            _LOGGER.error("Horizontal vane position %s not supported", position_label)
+            return False
+
+        return await self.async_send_command("AH{:.2f}".format(code))
+
+
+class MelView:
+    """Handler for multiple MelView devices under one user"""
+
+    def __init__(
+        self,
+        authentication,
+        localcontrol=False,
+        hedged_reads=False,
+        freshness=STATE_FRESHNESS,
+    ):
+        self._authentication = authentication
+        self._unitcount = 0
+        self._localcontrol = localcontrol
+        self._hedged_reads = hedged_reads
+        self._freshness = freshness
+
+    async def _async_read_rooms(self) -> tuple[int, list[Building] | None]:
+        """Request the buildings and units, returning the status and payload."""
+        async with self._authentication.scheduler.async_slot(
+            PRIORITY_POLL
+        ), ClientSession(timeout=self._authentication.timeouts["rooms"]) as session:
+            async with session.post(
+                self._authentication.api_url("rooms"),
+                json={"unitid": 0},
+                headers=HEADERS,
+                cookies=self._authentication.get_cookie(),
+            ) as req:
+                if req.status == 200:
+                    return req.status, await _async_read_json(req)
+                return req.status, None
+
+    def get_devices_from_snapshot(self, units: list[UnitSnapshot]):
+        """Return handlers rebuilt from a stored snapshot, without any request"""
+        devices = []
+        for unit in units:
+            device = MelViewDevice(
+                unit["unitid"],
+                unit["buildingid"],
+                unit["room"],
+                self._authentication,
+                self._localcontrol,
+                unit.get("building"),
+                self._hedged_reads,
+                self._freshness,
+            )
+            device.restore(unit["caps"], unit["state"], unit["time"])
+            devices.append(device)
+        return devices
+
+    async def async_get_devices_list(self, retry=True, refresh=True):
+        """Return all the devices found, as handlers
+
+        With ``refresh`` False the handlers are returned without reading
+        their capabilities and state.
+        """
+        devices = []
+        try:
+            req_status, reply = await self._authentication.retry_policy.async_call(
+                self._async_read_rooms
+            )
+        except Exception as err:
+            _LOGGER.error("Device list request failed: %s", err)
+            return None
+        if req_status == 200:
+            for building in reply:
+                for unit in building["units"]:
+                    device = MelViewDevice(
+                        unit["unitid"],
+                        building["buildingid"],
+                        unit["room"],
+                        self._authentication,
+                        self._localcontrol,
+                        building.get("building"),
+                        self._hedged_reads,
+                        self._freshness,
+                    )
+                    if refresh:
+                        await device.async_refresh()
+                    devices.append(device)
+            return devices
+
+        if req_status == 401 and retry:
+            _LOGGER.error("Device list error 401 (trying to re-login)")
+            if await self._authentication.async_login():
+                return await self.async_get_devices_list(False, refresh)
+
+        _LOGGER.error("Failed to get device list (status code invalid: %d)", req_status)
+
+        return None
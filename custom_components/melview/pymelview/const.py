@@ -0,0 +1,10 @@
+"""Protocol constants of the MelView cloud API and Wi-Fi adapters."""
+
+API_URL = "https://api.melview.net/api/"
+LOCAL_URL = "http://{}/smart"
+
+APPVERSION = "6.5.2090"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/18.4 Safari/605.1.15"
+}
+APIVERSION = 3
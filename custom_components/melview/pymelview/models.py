@@ -0,0 +1,105 @@
+"""Modes and payload shapes of the MelView API."""
+
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import NotRequired, TypedDict
+
+
+class MelViewMode(StrEnum):
+    """Operating modes; the values match Home Assistant's HVAC modes."""
+
+    AUTO = "auto"
+    HEAT = "heat"
+    COOL = "cool"
+    DRY = "dry"
+    FAN_ONLY = "fan_only"
+
+
+class LoginResponse(TypedDict, total=False):
+    """Body of login.aspx."""
+
+    userunits: int
+
+
+class RoomUnit(TypedDict):
+    unitid: str
+    room: str
+
+
+class Building(TypedDict):
+    """One entry of rooms.aspx."""
+
+    buildingid: int
+    building: NotRequired[str]
+    units: list[RoomUnit]
+
+
+class TemperatureRange(TypedDict):
+    min: float
+    max: float
+
+
+class UnitCaps(TypedDict, total=False):
+    """Body of unitcapabilities.aspx."""
+
+    unittype: str
+    modelname: str
+    fanstage: int
+    hasautofan: int
+    halfdeg: int
+    hasairdir: int
+    hasairdirh: int
+    hasswing: int
+    hasairauto: int
+    hasoutdoortemp: int
+    localip: str
+    # Keyed by the mode number as a string.
+    max: dict[str, TemperatureRange]
+    error: str
+    fault: str
+
+
+class Zone(TypedDict):
+    zoneid: int
+    name: str
+    status: int
+
+
+class UnitState(TypedDict, total=False):
+    """Body of a unitcommand.aspx state read."""
+
+    id: str
+    power: int
+    setmode: int
+    settemp: str
+    roomtemp: str
+    outdoortemp: str
+    setfan: int
+    airdir: int
+    airdirh: int
+    standby: int
+    zones: list[Zone]
+    error: str
+    fault: str
+
+
+class CommandResponse(TypedDict, total=False):
+    """Body of a unitcommand.aspx command."""
+
+    id: str
+    error: str
+    # Key to forward to the adapter's local endpoint.
+    lc: str
+
+
+class UnitSnapshot(TypedDict):
+    """What is needed to rebuild a unit handler without any request."""
+
+    unitid: str
+    buildingid: int
+    building: str | None
+    room: str
+    caps: UnitCaps
+    state: UnitState
+    time: float
@@ -11,8 +11,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import CONF_SENSOR
 from .coordinator import MelViewCoordinator
-from .entity import MelViewBaseEntity
-from .melview import VERTICAL_VANE, HORIZONTAL_VANE
+from .entity import MelViewBaseEntity, traced
+from .pymelview import HORIZONTAL_VANE, VERTICAL_VANE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -40,11 +40,12 @@ class MelViewVerticalVaneSelect(MelViewBaseEntity, SelectEntity):
         """Return available vertical vane positions."""
         return list(VERTICAL_VANE.values())
 
+    @traced
     async def async_select_option(self, option: str) -> None:
         """Set vertical vane position."""
         _LOGGER.debug("Select vertical vane: %s", option)
         if await self._device.async_set_vertical_vane(option):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
 
 class MelViewHorizontalVaneSelect(MelViewBaseEntity, SelectEntity):
@@ -70,11 +71,12 @@ class MelViewHorizontalVaneSelect(MelViewBaseEntity, SelectEntity):
         """Return available horizontal vane positions."""
         return list(HORIZONTAL_VANE.values())
 
+    @traced
     async def async_select_option(self, option: str) -> None:
         """Set horizontal vane position."""
         _LOGGER.debug("Select horizontal vane: %s", option)
         if await self._device.async_set_horizontal_vane(option):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
 
 async def async_setup_entry(
@@ -101,4 +103,4 @@ async def async_setup_entry(
             if getattr(coordinator.device, "has_horizontal_vane", False):
                 entities.append(MelViewHorizontalVaneSelect(coordinator))
 
-    async_add_entities(entities, update_before_add=True)
+    async_add_entities(entities)
@@ -8,15 +8,34 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import PERCENTAGE, UnitOfTemperature
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfTemperature,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 
 from .const import CONF_SENSOR
 from .entity import MelViewBaseEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+TREND_FIELDS = {
+    "roomtemp": "Room Temperature",
+    "settemp": "Target Temperature",
+    "outdoortemp": "Outdoor Temperature",
+    "coreefficiency": "Core Efficiency",
+}
+TREND_STATS = {
+    "rate": "Rate",
+    "minimum": "Min",
+    "maximum": "Max",
+    "mean": "Mean",
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -24,12 +43,15 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up MelView temperature sensors from a config entry."""
+    coordinators = entry.runtime_data
+    async_add_entities(
+        MelViewCommandLatencySensor(coordinator) for coordinator in coordinators
+    )
+
     if not entry.options.get(CONF_SENSOR, True):
         _LOGGER.debug("Sensor option is disabled in config entry.")
         return
 
-    coordinators = entry.runtime_data
-
     entities = [MelViewCurrentTempSensor(coordinator) for coordinator in coordinators]
     for coordinator in coordinators:
         if coordinator.device.get_unit_type() == "ERV":
@@ -41,7 +63,18 @@ async def async_setup_entry(
                     MelViewCoreEfficiencySensor(coordinator),
                 ]
             )
-    async_add_entities(entities, update_before_add=True)
+            trend_fields = ["roomtemp", "outdoortemp", "coreefficiency"]
+        else:
+            entities.append(MelViewSetpointReachedSensor(coordinator))
+            trend_fields = ["roomtemp", "settemp"]
+            if (coordinator.device._caps or {}).get("hasoutdoortemp"):
+                trend_fields.append("outdoortemp")
+        entities.extend(
+            MelViewTrendSensor(coordinator, field, stat)
+            for field in trend_fields
+            for stat in TREND_STATS
+        )
+    async_add_entities(entities)
 
 
 class MelViewCurrentTempSensor(MelViewBaseEntity, SensorEntity):
@@ -147,3 +180,106 @@ class MelViewCoreEfficiencySensor(MelViewBaseEntity, SensorEntity):
     def native_value(self):
         data = self.coordinator.data or {}
         return round(float(data.get("coreefficiency", 0)) * 100, 1)
+
+
+class MelViewTrendSensor(MelViewBaseEntity, SensorEntity):
+    """Rolling statistic over the recent polls of one state field."""
+
+    _attr_has_entity_name = True
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, field, stat):
+        super().__init__(coordinator, coordinator.device)
+        api = coordinator.device
+        self._series = coordinator.telemetry.series[field]
+        self._stat = stat
+        self._attr_name = f"{TREND_FIELDS[field]} {TREND_STATS[stat]}"
+        self._attr_unique_id = f"{api.get_id()}_{field}_{stat}"
+        # Only the room temperature rate is enabled by default.
+        self._attr_entity_registry_enabled_default = (
+            field == "roomtemp" and stat == "rate"
+        )
+        if field == "coreefficiency":
+            self._scale = 100
+            unit = PERCENTAGE
+        else:
+            self._scale = 1
+            unit = UnitOfTemperature.CELSIUS
+            if stat != "rate":
+                self._attr_device_class = SensorDeviceClass.TEMPERATURE
+        self._attr_native_unit_of_measurement = f"{unit}/h" if stat == "rate" else unit
+
+    @property
+    def native_value(self):
+        value = getattr(self._series, self._stat)
+        if value is None:
+            return None
+        return round(value * self._scale, 2)
+
+    @property
+    def extra_state_attributes(self):
+        return {"samples": len(self._series)}
+
+
+class MelViewSetpointReachedSensor(MelViewBaseEntity, SensorEntity):
+    """Sensor for when the room temperature last reached the setpoint."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Setpoint Reached"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    def __init__(self, coordinator):
+        super().__init__(coordinator, coordinator.device)
+        api = coordinator.device
+        self._telemetry = coordinator.telemetry
+        self._attr_unique_id = f"{api.get_id()}_setpoint_reached"
+
+    @property
+    def native_value(self):
+        reached_at = self._telemetry.setpoint_reached_at
+        if reached_at is None:
+            return None
+        return dt_util.utc_from_timestamp(reached_at)
+
+
+class MelViewCommandLatencySensor(MelViewBaseEntity, SensorEntity):
+    """Median time from a command to its confirmed state, over recent commands."""
+
+    _attr_has_entity_name = True
+    _attr_name = "Command Latency"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, coordinator):
+        super().__init__(coordinator, coordinator.device)
+        api = coordinator.device
+        self._attr_unique_id = f"{api.get_id()}_command_latency"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Commands are confirmed after the other entities have been updated.
+        self.async_on_remove(
+            self.coordinator.async_add_latency_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self):
+        latency = self._device.get_command_latency()
+        if latency is None:
+            return None
+        return round(latency["median"], 2)
+
+    @property
+    def extra_state_attributes(self):
+        latency = self._device.get_command_latency()
+        if latency is None:
+            return {"samples": 0}
+        return {
+            "mean": round(latency["mean"], 2),
+            "p95": round(latency["p95"], 2),
+            "max": round(latency["max"], 2),
+            "samples": latency["count"],
+        }
@@ -0,0 +1,125 @@
+"""Services for the MelView integration."""
+
+from __future__ import annotations
+
+import logging
+
+import voluptuous as vol
+
+from homeassistant.components.climate.const import (
+    ATTR_FAN_MODE,
+    ATTR_HVAC_MODE,
+    HVACMode,
+)
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_TEMPERATURE
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN
+from .coordinator import DEFAULT_PARALLEL, MelViewCoordinator, async_send_to_units
+from .pymelview import MODE
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BULK_COMMAND = "bulk_command"
+
+ATTR_UNIT_IDS = "unit_ids"
+ATTR_BUILDING_ID = "building_id"
+ATTR_POWER = "power"
+ATTR_MAX_PARALLEL = "max_parallel"
+
+BULK_COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_UNIT_IDS): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_BUILDING_ID): cv.string,
+            vol.Optional(ATTR_POWER): cv.boolean,
+            vol.Optional(ATTR_HVAC_MODE): vol.All(
+                vol.In([mode.value for mode in MODE]), vol.Coerce(HVACMode)
+            ),
+            vol.Optional(ATTR_TEMPERATURE): vol.Coerce(float),
+            vol.Optional(ATTR_FAN_MODE): cv.string,
+            vol.Optional(ATTR_MAX_PARALLEL, default=DEFAULT_PARALLEL): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=32)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_UNIT_IDS, ATTR_BUILDING_ID),
+    cv.has_at_least_one_key(
+        ATTR_POWER, ATTR_HVAC_MODE, ATTR_TEMPERATURE, ATTR_FAN_MODE
+    ),
+)
+
+
+def _loaded_coordinators(hass: HomeAssistant) -> list[MelViewCoordinator]:
+    """Return the coordinators of every loaded MelView account."""
+    return [
+        coordinator
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+        for coordinator in entry.runtime_data
+    ]
+
+
+async def _async_bulk_command(call: ServiceCall) -> ServiceResponse:
+    """Bring many units to the same state, confirming each unit afterwards.
+
+    Every unit that accepted its command gets its own confirmation read
+    once that unit's usual reflect delay has passed.
+    """
+    unit_ids = set(call.data.get(ATTR_UNIT_IDS, []))
+    building_id = call.data.get(ATTR_BUILDING_ID)
+
+    results = {}
+    targets = []
+    for coordinator in _loaded_coordinators(call.hass):
+        device = coordinator.device
+        unit_id = str(device.get_id())
+        if unit_id not in unit_ids and (
+            building_id is None or str(device.get_building_id()) != building_id
+        ):
+            continue
+        unit_ids.discard(unit_id)
+        results[unit_id] = {"name": device.get_friendly_name(), "success": False}
+        try:
+            commands = device.get_state_commands(
+                power=call.data.get(ATTR_POWER),
+                mode=call.data.get(ATTR_HVAC_MODE),
+                temperature=call.data.get(ATTR_TEMPERATURE),
+                fan_speed=call.data.get(ATTR_FAN_MODE),
+            )
+        except ValueError as err:
+            results[unit_id]["error"] = str(err)
+            continue
+        targets.append((coordinator, commands))
+
+    for unit_id in unit_ids:
+        results[unit_id] = {"name": None, "success": False, "error": "Unknown unit"}
+
+    _LOGGER.debug("Bulk command for %d unit(s)", len(targets))
+    sent = await async_send_to_units(
+        targets, call.data[ATTR_MAX_PARALLEL], f"{DOMAIN}.bulk_command"
+    )
+    for unit_id, ok in sent.items():
+        results[unit_id]["success"] = ok
+        if not ok:
+            results[unit_id]["error"] = "Command failed"
+
+    return {"units": results}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the MelView services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BULK_COMMAND,
+        _async_bulk_command,
+        schema=BULK_COMMAND_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
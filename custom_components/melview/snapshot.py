@@ -0,0 +1,73 @@
+"""Persisted snapshot of a MelView account, used for cold starts."""
+
+from __future__ import annotations
+
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+# Seconds to gather the polls of the whole fleet into a single write.
+SAVE_DELAY = 60
+
+
+class FleetSnapshot:
+    """Last known units, capabilities and state of one config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        self._entry = entry
+        self._store: Store[dict] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"
+        )
+        self._save_pending = False
+        # Units last loaded or saved, kept when there are no coordinators.
+        self._units: list[dict] = []
+
+    async def async_load(self) -> list[dict] | None:
+        """Return the stored units, or None if there is no usable snapshot."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:  # pragma: no cover - corrupt storage file
+            _LOGGER.warning("Ignoring unreadable MelView snapshot: %s", err)
+            return None
+        if not data or not data.get("units"):
+            return None
+        self._units = data["units"]
+        return self._units
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the snapshot once the current wave of polls has settled."""
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        self._save_pending = False
+        coordinators = getattr(self._entry, "runtime_data", None)
+        if coordinators is not None:
+            units = (coordinator.device.get_snapshot() for coordinator in coordinators)
+            self._units = [unit for unit in units if unit is not None]
+        return {"units": self._units}
+
+    async def async_flush(self) -> None:
+        """Write a pending snapshot now instead of after the save delay."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Forget the snapshot, e.g. after the account's units changed.
+
+        A pending delayed write is cancelled, so it cannot recreate the file.
+        """
+        self._save_pending = False
+        self._units = []
+        await self._store.async_remove()
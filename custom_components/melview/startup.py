@@ -0,0 +1,95 @@
+"""Phase-by-phase timing of a MelView config entry's startup."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# Slowest units named in the summary line for each per-unit phase.
+SLOWEST_UNITS = 3
+
+
+class StartupTimer:
+    """Time the phases of one account's startup, overall and per unit.
+
+    Phases that run once (login, unit list, platform setup) are kept by
+    name. Per-unit phases (capabilities, first refresh) are kept for each
+    unit and reported as their total and slowest units.
+    """
+
+    def __init__(self) -> None:
+        self.path: str | None = None
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.duration: float | None = None
+        self.phases: dict[str, float] = {}
+        self.units: dict[str, dict[str, float]] = {}
+        self._names: dict[str, str] = {}
+
+    @contextmanager
+    def phase(
+        self, name: str, unit_id: Any = None, unit_name: str | None = None
+    ) -> Iterator[None]:
+        """Time the enclosed block as ``name``, for one unit if given.
+
+        A phase that raises is still recorded, so a slow failure shows up.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            if unit_id is None:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            else:
+                unit = self.units.setdefault(str(unit_id), {})
+                unit[name] = unit.get(name, 0.0) + elapsed
+                if unit_name is not None:
+                    self._names[str(unit_id)] = unit_name
+
+    def finish(self) -> None:
+        self.duration = time.monotonic() - self._start
+
+    def _unit_phase_names(self) -> list[str]:
+        names: dict[str, None] = {}
+        for unit in self.units.values():
+            names.update(dict.fromkeys(unit))
+        return list(names)
+
+    def summary(self) -> str:
+        """Return the breakdown as a single log line."""
+        parts = [f"{name} {elapsed:.1f} s" for name, elapsed in self.phases.items()]
+        for name in self._unit_phase_names():
+            times = {
+                unit_id: unit[name]
+                for unit_id, unit in self.units.items()
+                if name in unit
+            }
+            slowest = sorted(times, key=times.get, reverse=True)[:SLOWEST_UNITS]
+            parts.append(
+                f"{name} {sum(times.values()):.1f} s over {len(times)} unit(s) "
+                "(slowest: "
+                + ", ".join(
+                    f"{self._names.get(unit_id, unit_id)} {times[unit_id]:.1f} s"
+                    for unit_id in slowest
+                )
+                + ")"
+            )
+        total = (
+            f"{self.duration:.1f} s" if self.duration is not None else "in progress"
+        )
+        return f"{self.path or 'setup'} {total}: " + ", ".join(parts)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "started": self.started,
+            "duration": self.duration,
+            "phases": dict(self.phases),
+            "units": {
+                unit_id: {"name": self._names.get(unit_id), **phases}
+                for unit_id, phases in self.units.items()
+            },
+        }
@@ -3,7 +3,7 @@ import logging
 from homeassistant.components.switch import SwitchEntity
 
 from .coordinator import MelViewCoordinator
-from .entity import MelViewBaseEntity
+from .entity import MelViewBaseEntity, traced
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -31,17 +31,19 @@ class MelViewZoneSwitch(MelViewBaseEntity, SwitchEntity):
             "Spill active": zone.status == 2,
         }
 
+    @traced
     async def async_turn_on(self):
         """Turn on the zone"""
         _LOGGER.debug("Switch on zone %s", self._attr_name)
         if await self.coordinator.async_enable_zone(self._id):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
+    @traced
     async def async_turn_off(self):
         """Turn off the zone"""
         _LOGGER.debug("Switch off zone %s", self._attr_name)
         if await self.coordinator.async_disable_zone(self._id):
-            await self.coordinator.async_refresh()
+            self.coordinator.async_schedule_confirmation()
 
 
 async def async_setup_entry(hass, entry, async_add_entities) -> None:
@@ -54,4 +56,4 @@ async def async_setup_entry(hass, entry, async_add_entities) -> None:
         for zone in coordinator.get_zones()
     ]
 
-    async_add_entities(entities, update_before_add=True)
+    async_add_entities(entities)
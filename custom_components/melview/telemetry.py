@@ -0,0 +1,134 @@
+"""Short-term telemetry history for MelView units."""
+
+from __future__ import annotations
+
+from array import array
+from collections import deque
+
+# Samples kept per field; at the 30 s poll interval this covers one hour.
+TELEMETRY_SAMPLES = 120
+TELEMETRY_FIELDS = ("roomtemp", "settemp", "outdoortemp", "coreefficiency")
+# Room temperature within this many degrees of the setpoint counts as reached.
+SETPOINT_TOLERANCE = 0.5
+
+
+class TelemetrySeries:
+    """Fixed-size ring of samples for one field with rolling statistics.
+
+    Samples live in preallocated ``array("d")`` buffers. The running sum and
+    the monotonic min/max queues make every statistic O(1) per sample.
+    """
+
+    def __init__(self, size: int = TELEMETRY_SAMPLES):
+        self._size = size
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._count = 0
+        self._total = 0  # Samples ever appended; the next sample's index.
+        self._sum = 0.0
+        # Indices of candidate minimum/maximum samples, oldest first.
+        self._min: deque[int] = deque()
+        self._max: deque[int] = deque()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _value(self, index: int) -> float:
+        return self._values[index % self._size]
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, evicting the oldest once the ring is full."""
+        index = self._total
+        if self._count == self._size:
+            oldest = index - self._size
+            self._sum -= self._value(oldest)
+            if self._min[0] == oldest:
+                self._min.popleft()
+            if self._max[0] == oldest:
+                self._max.popleft()
+        else:
+            self._count += 1
+
+        slot = index % self._size
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self._total += 1
+        if slot == self._size - 1:
+            # Resync once per lap so float error in the running sum can't build up.
+            self._sum = sum(self._values)
+        else:
+            self._sum += value
+
+        while self._min and self._value(self._min[-1]) >= value:
+            self._min.pop()
+        self._min.append(index)
+        while self._max and self._value(self._max[-1]) <= value:
+            self._max.pop()
+        self._max.append(index)
+
+    @property
+    def latest(self) -> float | None:
+        if not self._count:
+            return None
+        return self._value(self._total - 1)
+
+    @property
+    def mean(self) -> float | None:
+        if not self._count:
+            return None
+        return self._sum / self._count
+
+    @property
+    def minimum(self) -> float | None:
+        if not self._count:
+            return None
+        return self._value(self._min[0])
+
+    @property
+    def maximum(self) -> float | None:
+        if not self._count:
+            return None
+        return self._value(self._max[0])
+
+    @property
+    def rate(self) -> float | None:
+        """Change per hour between the oldest and newest sample."""
+        if self._count < 2:
+            return None
+        newest = (self._total - 1) % self._size
+        oldest = (self._total - self._count) % self._size
+        elapsed = self._times[newest] - self._times[oldest]
+        if elapsed <= 0:
+            return None
+        return (self._values[newest] - self._values[oldest]) * 3600 / elapsed
+
+
+class UnitTelemetry:
+    """Telemetry rings for one unit, fed from each poll."""
+
+    def __init__(self, size: int = TELEMETRY_SAMPLES):
+        self.series = {field: TelemetrySeries(size) for field in TELEMETRY_FIELDS}
+        self.setpoint_reached_at: float | None = None
+        self._setpoint: float | None = None
+
+    def record(self, timestamp: float, data: dict) -> None:
+        """Append the numeric fields of a state payload."""
+        for field, series in self.series.items():
+            try:
+                series.append(timestamp, float(data[field]))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        setpoint = self.series["settemp"].latest
+        room = self.series["roomtemp"].latest
+        if not data.get("power") or setpoint != self._setpoint:
+            self.setpoint_reached_at = None
+        self._setpoint = setpoint
+        if (
+            data.get("power")
+            and self.setpoint_reached_at is None
+            and setpoint is not None
+            and room is not None
+            and abs(room - setpoint) <= SETPOINT_TOLERANCE
+        ):
+            self.setpoint_reached_at = timestamp
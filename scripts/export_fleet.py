@@ -0,0 +1,188 @@
+"""Export the capabilities and state of every MelView unit as NDJSON.
+
+Logs in to each account, discovers its units and reads their capabilities
+and current state, several units at a time. One JSON record per unit is
+written to stdout as soon as it has been read:
+
+    MELVIEW_PASSWORD=... python scripts/export_fleet.py --email me@example.com
+    python scripts/export_fleet.py --accounts accounts.json --parallel 16 > fleet.ndjson
+
+``accounts.json`` is a list of ``{"email": ..., "password": ...}`` objects.
+Records of units that could not be read carry an ``error`` field, and the
+script then exits with status 1. Only aiohttp is required, not Home
+Assistant.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# Appended, so the integration's select.py cannot shadow the stdlib module.
+sys.path.append(str(REPO_ROOT / "custom_components" / "melview"))
+
+from pymelview import (  # noqa: E402
+    API_URL,
+    MelView,
+    MelViewAuthentication,
+    MelViewCommError,
+    MelViewDevice,
+)
+
+_LOGGER = logging.getLogger("export_fleet")
+
+DEFAULT_PARALLEL = 8
+
+
+def positive_int(value: str) -> int:
+    """Parse a count that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def load_accounts(args: argparse.Namespace) -> list[dict]:
+    """Return the accounts to export from the command line options."""
+    accounts = []
+    if args.accounts is not None:
+        accounts.extend(json.loads(args.accounts.read_text()))
+    if args.email is not None:
+        password = os.environ.get("MELVIEW_PASSWORD")
+        if not password:
+            raise SystemExit("Set MELVIEW_PASSWORD to the password for --email")
+        accounts.append({"email": args.email, "password": password})
+    if not accounts:
+        raise SystemExit("Nothing to export: pass --email or --accounts")
+    return accounts
+
+
+def write_record(record: dict) -> None:
+    sys.stdout.write(json.dumps(record, separators=(",", ":")) + "\n")
+    sys.stdout.flush()
+
+
+async def async_read_unit(email: str, device: MelViewDevice) -> dict:
+    """Read one unit's capabilities and state into an export record."""
+    record = {
+        "account": email,
+        "unitid": device.get_id(),
+        "buildingid": device.get_building_id(),
+        "building": device.get_building_name(),
+        "room": device.get_friendly_name(),
+        "time": time.time(),
+    }
+    try:
+        if not await device.async_refresh_device_caps():
+            record["error"] = "Unable to read capabilities"
+        elif not await device.async_refresh_device_info(max_age=0):
+            record["error"] = "Unable to read state"
+    except MelViewCommError:
+        # The state is still returned, with the COMM fault in it.
+        record["error"] = "COMM"
+    except Exception as err:
+        record["error"] = f"{type(err).__name__}: {err}"
+    record["caps"] = device._caps
+    record["state"] = device._json
+    return record
+
+
+async def async_export_account(
+    account: dict, args: argparse.Namespace, semaphore: asyncio.Semaphore
+) -> tuple[int, int]:
+    """Stream the records of one account, returning (units, failures)."""
+    email = account["email"]
+    auth = MelViewAuthentication(email, account["password"], base_url=args.api_url)
+    try:
+        logged_in = await auth.async_login()
+    except Exception as err:
+        logged_in = False
+        _LOGGER.error("Login failed for %s: %s", email, err)
+    if not logged_in:
+        write_record({"account": email, "error": "Login failed"})
+        return 0, 1
+
+    devices = await MelView(auth).async_get_devices_list(refresh=False)
+    if devices is None:
+        write_record({"account": email, "error": "Unable to list units"})
+        return 0, 1
+    _LOGGER.info("%s: %d unit(s)", email, len(devices))
+
+    # Units are taken off the queue as they are read, so finished units and
+    # their payloads are released instead of accumulating.
+    pending = deque(devices)
+    del devices
+    failures = 0
+    units = len(pending)
+
+    async def _async_worker() -> None:
+        nonlocal failures
+        while pending:
+            device = pending.popleft()
+            async with semaphore:
+                record = await async_read_unit(email, device)
+            if "error" in record:
+                failures += 1
+            write_record(record)
+
+    await asyncio.gather(*(_async_worker() for _ in range(args.parallel)))
+    return units, failures
+
+
+async def async_export(args: argparse.Namespace) -> int:
+    accounts = load_accounts(args)
+    # Shared by every account so --parallel bounds the whole export.
+    semaphore = asyncio.Semaphore(args.parallel)
+    start = time.monotonic()
+    results = await asyncio.gather(
+        *(async_export_account(account, args, semaphore) for account in accounts)
+    )
+    units = sum(count for count, _ in results)
+    failures = sum(failed for _, failed in results)
+    _LOGGER.info(
+        "Exported %d unit(s) from %d account(s) in %.1f s, %d failure(s)",
+        units,
+        len(accounts),
+        time.monotonic() - start,
+        failures,
+    )
+    return 1 if failures else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--email", help="Account to export, password from MELVIEW_PASSWORD"
+    )
+    parser.add_argument(
+        "--accounts", type=Path, help="JSON list of {email, password} objects"
+    )
+    parser.add_argument(
+        "--parallel",
+        type=positive_int,
+        default=DEFAULT_PARALLEL,
+        help="Units read at the same time",
+    )
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    # Progress goes to stderr so stdout stays pure NDJSON.
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr
+    )
+    return asyncio.run(async_export(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+"""Local stand-in for the MelView cloud API and Wi-Fi adapters.
+
+Record real traffic (redacted) into a fixture file by pointing a client at
+the recorder, which forwards every request to the real cloud:
+
+    python scripts/fake_melview.py record fixtures.json
+
+Recorded unit and building IDs are replaced by synthetic ones and room and
+building names by generic ones. The mapping to the real IDs is kept in
+``fixtures.json.ids`` so later recordings stay consistent; keep that file
+private and share only the fixtures.
+
+Replay the fixtures offline with the recorded latencies:
+
+    python scripts/fake_melview.py replay fixtures.json --latency-scale 1.0
+
+Clients use ``http://127.0.0.1:8080/api/`` as the API base URL
+(``MelViewAuthentication(..., base_url=...)``). In replay, each unit's
+``localip`` points back at this server, so local ``/smart`` deliveries are
+answered here too. Commands sent to ``unitcommand.aspx`` are applied to the
+replayed state, optionally after ``--reflect-delay`` seconds, as the real
+cloud does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import random
+import secrets
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession, web
+
+_LOGGER = logging.getLogger("fake_melview")
+
+UPSTREAM_URL = "https://api.melview.net/api/"
+# Fields removed from recorded payloads.
+REDACT_KEYS = {
+    "user",
+    "pass",
+    "password",
+    "email",
+    "localip",
+    "mac",
+    "macaddress",
+    "serial",
+    "serialno",
+    "ssid",
+    "lc",
+}
+# Fields holding unit or building IDs, replaced by synthetic IDs.
+ID_KEYS = {"unitid", "buildingid", "id"}
+# Fields holding names chosen by the customer, with the ID they are named by.
+NAME_KEYS = {"room": ("unitid", "Room"), "building": ("buildingid", "Building")}
+# First synthetic ID handed out.
+SYNTHETIC_ID_START = 100001
+# Used when a fixture has no recorded latency for an endpoint.
+DEFAULT_LATENCY = 0.05
+
+
+class IdMap:
+    """Stable mapping of real unit and building IDs to synthetic ones."""
+
+    def __init__(self, ids: dict[str, int] | None = None):
+        self.ids = dict(ids or {})
+
+    def map(self, value):
+        """Return the synthetic ID for a real one, keeping its type."""
+        if value is None or value == "":
+            return value
+        synthetic = self.ids.setdefault(
+            str(value), SYNTHETIC_ID_START + len(self.ids)
+        )
+        return str(synthetic) if isinstance(value, str) else synthetic
+
+
+def redact(value, ids: IdMap):
+    """Return a copy of a payload with identifying fields replaced."""
+    if isinstance(value, dict):
+        redacted = {}
+        for key, item in value.items():
+            lower = key.lower()
+            if lower in REDACT_KEYS:
+                redacted[key] = "REDACTED"
+            elif lower in ID_KEYS and not isinstance(item, (dict, list)):
+                redacted[key] = ids.map(item)
+            elif lower in NAME_KEYS and not isinstance(item, (dict, list)):
+                id_key, label = NAME_KEYS[lower]
+                if value.get(id_key) is not None:
+                    redacted[key] = f"{label} {ids.map(value[id_key])}"
+                else:
+                    redacted[key] = label
+            else:
+                redacted[key] = redact(item, ids)
+        return redacted
+    if isinstance(value, list):
+        return [redact(item, ids) for item in value]
+    return value
+
+
+def empty_fixtures() -> dict:
+    return {"login": {}, "rooms": [], "units": {}, "latency": {}}
+
+
+def apply_commands(state: dict, commands: str) -> None:
+    """Apply a comma-separated unitcommand string to a state payload."""
+    for command in commands.split(","):
+        code, value = command[:2], command[2:]
+        if code == "PW":
+            state["power"] = int(value)
+        elif code == "MD":
+            state["setmode"] = int(value)
+        elif code == "TS":
+            temp = float(value)
+            if isinstance(state.get("settemp"), str):
+                temp = str(temp)
+            state["settemp"] = temp
+        elif code == "FS":
+            state["setfan"] = int(float(value))
+        elif code == "AV":
+            state["airdir"] = int(float(value))
+        elif code == "AH":
+            state["airdirh"] = int(float(value))
+        elif command.startswith("Z") and len(command) > 2:
+            zoneid, status = command[1:-1], int(command[-1])
+            for zone in state.get("zones", []):
+                if str(zone["zoneid"]) == zoneid:
+                    zone["status"] = status
+
+
+class FakeMelView:
+    """aiohttp application replaying MelView fixtures."""
+
+    def __init__(
+        self,
+        fixtures: dict,
+        *,
+        latency_scale: float = 1.0,
+        reflect_delay: float = 0.0,
+        local_host: str | None = None,
+    ):
+        self.fixtures = fixtures
+        self.latency_scale = latency_scale
+        self.reflect_delay = reflect_delay
+        self.local_host = local_host
+        self.states = {
+            unitid: copy.deepcopy(unit["state"])
+            for unitid, unit in fixtures["units"].items()
+        }
+        self.token = secrets.token_hex(8)
+        self.requests: dict[str, int] = {}
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/{endpoint}.aspx", self._handle_api)
+        app.router.add_post("/smart", self._handle_smart)
+        return app
+
+    async def _delay(self, endpoint: str) -> None:
+        samples = self.fixtures["latency"].get(endpoint) or [DEFAULT_LATENCY]
+        await asyncio.sleep(random.choice(samples) * self.latency_scale)
+
+    async def _handle_api(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"]
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        payload = await request.json()
+        await self._delay(endpoint)
+        fault = await self.async_inject_fault(endpoint, payload)
+        if fault is not None:
+            return fault
+
+        if endpoint == "login":
+            response = web.json_response(self._login_body())
+            response.set_cookie("auth", self.token)
+            return response
+        if request.cookies.get("auth") != self.token:
+            return web.json_response({"error": "auth"}, status=401)
+        if endpoint == "rooms":
+            return web.json_response(self.fixtures["rooms"])
+
+        unitid = str(payload.get("unitid"))
+        if unitid not in self.states:
+            return web.json_response({"error": "unknown unit"}, status=404)
+        if endpoint == "unitcapabilities":
+            return web.json_response(self._caps_body(unitid))
+        if endpoint == "unitcommand":
+            if "commands" in payload:
+                self._schedule_commands(unitid, payload["commands"])
+                return web.json_response(
+                    {"id": unitid, "error": "ok", "lc": secrets.token_hex(8)}
+                )
+            return web.json_response(self.state_body(unitid))
+        return web.json_response({"error": "unknown endpoint"}, status=404)
+
+    async def _handle_smart(self, request: web.Request) -> web.Response:
+        self.requests["smart"] = self.requests.get("smart", 0) + 1
+        await request.read()
+        await self._delay("smart")
+        return web.Response(
+            text='<?xml version="1.0" encoding="UTF-8"?><LSV></LSV>',
+            content_type="text/xml",
+        )
+
+    async def async_inject_fault(self, endpoint: str, payload: dict):
+        """Return a response to send instead of the replayed one, if any."""
+        return None
+
+    def _login_body(self) -> dict:
+        body = dict(self.fixtures["login"])
+        body.setdefault("userunits", len(self.states))
+        return body
+
+    def _caps_body(self, unitid: str) -> dict:
+        caps = copy.deepcopy(self.fixtures["units"][unitid]["caps"])
+        if self.local_host is not None:
+            caps["localip"] = self.local_host
+        else:
+            caps.pop("localip", None)
+        return caps
+
+    def state_body(self, unitid: str) -> dict:
+        return self.states[unitid]
+
+    def _schedule_commands(self, unitid: str, commands: str) -> None:
+        state = self.states[unitid]
+        if self.reflect_delay > 0:
+            asyncio.get_running_loop().call_later(
+                self.reflect_delay, apply_commands, state, commands
+            )
+        else:
+            apply_commands(state, commands)
+
+
+class Recorder:
+    """aiohttp application forwarding to the real cloud and recording."""
+
+    def __init__(self, path: Path, upstream: str = UPSTREAM_URL):
+        self.path = path
+        self.upstream = upstream
+        self.fixtures = (
+            json.loads(path.read_text()) if path.exists() else empty_fixtures()
+        )
+        self._ids_path = path.with_name(path.name + ".ids")
+        self.ids = IdMap(
+            json.loads(self._ids_path.read_text())
+            if self._ids_path.exists()
+            else None
+        )
+        self._session: ClientSession | None = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/api/{endpoint}.aspx", self._handle_api)
+        app.on_cleanup.append(self._async_cleanup)
+        return app
+
+    async def _async_cleanup(self, app: web.Application) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    async def _handle_api(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"]
+        payload = await request.json()
+        if self._session is None:
+            self._session = ClientSession()
+
+        start = time.monotonic()
+        async with self._session.post(
+            f"{self.upstream}{endpoint}.aspx",
+            json=payload,
+            cookies=request.cookies,
+            headers={"User-Agent": request.headers.get("User-Agent", "")},
+        ) as upstream:
+            body = await upstream.read()
+            status = upstream.status
+            cookies = {
+                name: morsel.value for name, morsel in upstream.cookies.items()
+            }
+        latency = time.monotonic() - start
+
+        if status == 200:
+            self._record(endpoint, payload, json.loads(body), latency)
+        response = web.Response(
+            body=body, status=status, content_type="application/json"
+        )
+        for name, value in cookies.items():
+            response.set_cookie(name, value)
+        return response
+
+    def _record(self, endpoint: str, payload: dict, body, latency: float) -> None:
+        self.fixtures["latency"].setdefault(endpoint, []).append(round(latency, 4))
+        unitid = str(self.ids.map(payload.get("unitid")))
+        if endpoint == "login":
+            self.fixtures["login"] = redact(body, self.ids)
+        elif endpoint == "rooms":
+            self.fixtures["rooms"] = redact(body, self.ids)
+        elif endpoint == "unitcapabilities":
+            caps = redact(body, self.ids)
+            self.fixtures["units"].setdefault(unitid, {})["caps"] = caps
+        elif endpoint == "unitcommand" and "commands" not in payload:
+            state = redact(body, self.ids)
+            self.fixtures["units"].setdefault(unitid, {})["state"] = state
+        self._ids_path.write_text(json.dumps(self.ids.ids, indent=2))
+        self.path.write_text(json.dumps(self.fixtures, indent=2))
+        _LOGGER.info("Recorded %s (%.0f ms)", endpoint, latency * 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--upstream", default=UPSTREAM_URL)
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--reflect-delay", type=float, default=0.0)
+    parser.add_argument(
+        "--no-local", action="store_true", help="Do not advertise a local adapter"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.mode == "record":
+        app = Recorder(args.fixtures, args.upstream).make_app()
+    else:
+        app = FakeMelView(
+            json.loads(args.fixtures.read_text()),
+            latency_scale=args.latency_scale,
+            reflect_delay=args.reflect_delay,
+            local_host=None if args.no_local else f"{args.host}:{args.port}",
+        ).make_app()
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Scale and fault-injection simulation of the MelView integration.
+
+Runs the real integration (``async_setup_entry``, the coordinators and every
+platform) inside a throwaway Home Assistant instance, against an in-process
+synthetic MelView API built on ``fake_melview.FakeMelView``:
+
+    python scripts/simulate.py --units 200 --duration 120 --error-rate 0.02
+
+Requires the ``homeassistant`` package. The report is printed as JSON; any
+``--max-*`` threshold that is exceeded makes the script exit with status 1, so
+it can be used as a regression gate.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.setup import async_setup_component
+
+from fake_melview import FakeMelView
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DOMAIN = "melview"
+UNITS_PER_BUILDING = 20
+
+
+def synthetic_fixtures(units: int) -> dict:
+    """Build fixtures for a fleet of identical air conditioners."""
+    fixtures = {"login": {}, "rooms": [], "units": {}, "latency": {}}
+    for index in range(units):
+        unitid = str(100000 + index)
+        building = index // UNITS_PER_BUILDING
+        if index % UNITS_PER_BUILDING == 0:
+            fixtures["rooms"].append(
+                {
+                    "buildingid": building,
+                    "building": f"Building {building}",
+                    "units": [],
+                }
+            )
+        fixtures["rooms"][-1]["units"].append(
+            {"unitid": unitid, "room": f"Unit {index}"}
+        )
+        fixtures["units"][unitid] = {
+            "caps": {
+                "unittype": "RAC",
+                "modelname": "Simulated",
+                "fanstage": 3,
+                "hasautofan": 1,
+                "halfdeg": 1,
+                "hasairdir": 1,
+                "hasairdirh": 0,
+                "hasswing": 1,
+                "hasairauto": 1,
+                "hasoutdoortemp": 0,
+                "max": {
+                    mode: {"min": 16, "max": 31}
+                    for mode in ("1", "2", "3", "7", "8")
+                },
+                "error": "ok",
+                "fault": "",
+            },
+            "state": {
+                "id": unitid,
+                "power": index % 2,
+                "setmode": 3,
+                "settemp": "24",
+                "roomtemp": f"{20 + index % 8}",
+                "setfan": 0,
+                "airdir": 0,
+                "airdirh": 0,
+                "standby": 0,
+                "error": "ok",
+                "fault": "",
+            },
+        }
+    return fixtures
+
+
+class SimulatedMelView(FakeMelView):
+    """Fake API with a latency distribution and injected faults."""
+
+    def __init__(self, fixtures: dict, args: argparse.Namespace, local_host: str):
+        super().__init__(
+            fixtures, reflect_delay=args.reflect_delay, local_host=local_host
+        )
+        self.args = args
+        comm_count = int(len(self.states) * args.comm_fraction)
+        self.comm_units = set(random.sample(sorted(self.states), comm_count))
+        self._token_issued = time.monotonic()
+        self.faults: dict[str, int] = {}
+
+    async def _delay(self, endpoint: str) -> None:
+        delay = random.lognormvariate(
+            math.log(self.args.latency_median), self.args.latency_sigma
+        )
+        if random.random() < self.args.slow_rate:
+            delay += self.args.slow_latency
+        await asyncio.sleep(delay)
+
+    def _fault(self, kind: str) -> None:
+        self.faults[kind] = self.faults.get(kind, 0) + 1
+
+    async def async_inject_fault(self, endpoint: str, payload: dict):
+        if endpoint != "login" and self.args.auth_expiry:
+            # Expiring the session makes every unit hit a 401 at once.
+            if time.monotonic() - self._token_issued > self.args.auth_expiry:
+                self.token = f"expired-{time.monotonic()}"
+                self._token_issued = time.monotonic()
+        elif endpoint == "login":
+            self._token_issued = time.monotonic()
+        if random.random() < self.args.error_rate:
+            self._fault("5xx")
+            return web.json_response({"error": "unavailable"}, status=503)
+        return None
+
+    def state_body(self, unitid: str) -> dict:
+        if unitid in self.comm_units:
+            self._fault("comm")
+            return {**self.states[unitid], "fault": "COMM"}
+        return super().state_body(unitid)
+
+
+async def async_start_fake(
+    args: argparse.Namespace,
+) -> tuple[SimulatedMelView, web.AppRunner, str]:
+    """Serve the synthetic API on a free local port."""
+    fake = SimulatedMelView(synthetic_fixtures(args.units), args, local_host="")
+    runner = web.AppRunner(fake.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    fake.local_host = f"127.0.0.1:{port}"
+    return fake, runner, f"http://127.0.0.1:{port}/api/"
+
+
+def write_config_entry(
+    config_dir: Path, api_url: str, args: argparse.Namespace
+) -> None:
+    """Store a config entry for the simulated account before HA loads."""
+    (config_dir / "custom_components").mkdir()
+    (config_dir / "custom_components" / DOMAIN).symlink_to(
+        REPO_ROOT / "custom_components" / DOMAIN
+    )
+    storage = config_dir / ".storage"
+    storage.mkdir()
+    entry = {
+        "entry_id": "simulated",
+        "domain": DOMAIN,
+        "title": "simulated@example.com",
+        "data": {
+            "email": "simulated@example.com",
+            "password": "simulated",
+            "api_url": api_url,
+        },
+        "options": {"local": args.local, "sensor": True, "building": args.building},
+        "source": "user",
+        "version": 1,
+        "unique_id": "simulated@example.com",
+        "pref_disable_new_entities": False,
+        "pref_disable_polling": False,
+        "disabled_by": None,
+    }
+    (storage / "core.config_entries").write_text(
+        json.dumps(
+            {
+                "version": 1,
+                "minor_version": 1,
+                "key": "core.config_entries",
+                "data": {"entries": [entry]},
+            }
+        )
+    )
+
+
+async def async_measure_loop_lag(samples: list[float], stop: asyncio.Event) -> None:
+    """Record how late the event loop wakes a 100 ms sleeper."""
+    while not stop.is_set():
+        start = time.monotonic()
+        await asyncio.sleep(0.1)
+        samples.append(time.monotonic() - start - 0.1)
+
+
+def expected_climate_entities(args: argparse.Namespace) -> int:
+    """Return the climate entities a complete setup creates."""
+    buildings = math.ceil(args.units / UNITS_PER_BUILDING)
+    return args.units + (buildings if args.building else 0)
+
+
+def percentile(values: list[float], fraction: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[int(fraction * (len(values) - 1))]
+
+
+async def async_simulate(args: argparse.Namespace) -> dict:
+    fake, runner, api_url = await async_start_fake(args)
+    loop_lag: list[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(async_measure_loop_lag(loop_lag, stop))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_dir = Path(tmp)
+        write_config_entry(config_dir, api_url, args)
+
+        hass = HomeAssistant(str(config_dir))
+        hass.config.skip_pip = True
+        loader.async_setup(hass)
+        await bootstrap.async_load_base_functionality(hass)
+        hass.config_entries = config_entries.ConfigEntries(hass, {})
+        await hass.config_entries.async_initialize()
+        await hass.async_start()
+
+        start = time.monotonic()
+        await async_setup_component(hass, DOMAIN, {})
+        await hass.async_block_till_done()
+        entry = hass.config_entries.async_get_entry("simulated")
+        entries = er.async_entries_for_config_entry(er.async_get(hass), "simulated")
+        entity_ids = [entity.entity_id for entity in entries if not entity.disabled]
+        # A failed setup has no entities to wait for, which would otherwise
+        # report an instant setup that passes every limit.
+        setup_errors = []
+        if entry.state is not ConfigEntryState.LOADED:
+            setup_errors.append(f"config entry is {entry.state.value}")
+        climates = sum(1 for entity in entries if entity.domain == "climate")
+        if climates != expected_climate_entities(args):
+            setup_errors.append(
+                f"{climates} climate entities, "
+                f"expected {expected_climate_entities(args)}"
+            )
+        try:
+            async with asyncio.timeout(args.setup_timeout):
+                while not setup_errors and any(
+                    hass.states.get(entity_id) is None for entity_id in entity_ids
+                ):
+                    await asyncio.sleep(0.05)
+        except TimeoutError:
+            missing = sum(
+                1 for entity_id in entity_ids if hass.states.get(entity_id) is None
+            )
+            setup_errors.append(
+                f"{missing} entities without a state after {args.setup_timeout} s"
+            )
+        time_to_entities = time.monotonic() - start
+
+        requests_before = sum(fake.requests.values())
+        if not setup_errors:
+            await asyncio.sleep(args.duration)
+        requests = sum(fake.requests.values()) - requests_before
+
+        coordinators = getattr(entry, "runtime_data", None) or []
+        poll_durations = [
+            duration
+            for coordinator in coordinators
+            for duration in coordinator.poll_durations
+        ]
+        await hass.async_stop()
+
+    stop.set()
+    await lag_task
+    await runner.cleanup()
+
+    return {
+        "units": args.units,
+        "setup_errors": setup_errors,
+        "entities": len(entity_ids),
+        "time_to_all_entities_s": round(time_to_entities, 3),
+        "requests_per_minute": round(requests * 60 / args.duration, 1),
+        "requests_by_endpoint": fake.requests,
+        "faults_injected": fake.faults,
+        "p95_poll_duration_s": percentile(poll_durations, 0.95),
+        "mean_poll_duration_s": (
+            statistics.fmean(poll_durations) if poll_durations else None
+        ),
+        "p95_loop_lag_s": percentile(loop_lag, 0.95),
+        # ru_maxrss is reported in kilobytes on Linux.
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--units", type=int, default=10)
+    parser.add_argument(
+        "--duration", type=float, default=90, help="Seconds to observe polling"
+    )
+    parser.add_argument("--latency-median", type=float, default=0.3)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of 5xx responses"
+    )
+    parser.add_argument(
+        "--comm-fraction", type=float, default=0.0, help="Share of units in COMM fault"
+    )
+    parser.add_argument(
+        "--auth-expiry", type=float, default=0.0, help="Seconds before sessions expire"
+    )
+    parser.add_argument("--reflect-delay", type=float, default=0.0)
+    parser.add_argument(
+        "--setup-timeout",
+        type=float,
+        default=300,
+        help="Seconds to wait for every entity to have a state",
+    )
+    parser.add_argument("--local", action="store_true", help="Use local delivery")
+    parser.add_argument("--building", action="store_true", help="Add building entities")
+    parser.add_argument("--max-setup", type=float, help="Limit for time to entities")
+    parser.add_argument("--max-p95-poll", type=float, help="Limit for p95 poll time")
+    parser.add_argument("--max-rpm", type=float, help="Limit for requests per minute")
+    parser.add_argument("--max-rss-mb", type=float, help="Limit for peak RSS")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    report = asyncio.run(async_simulate(args))
+    print(json.dumps(report, indent=2))
+
+    limits = {
+        "time_to_all_entities_s": args.max_setup,
+        "p95_poll_duration_s": args.max_p95_poll,
+        "requests_per_minute": args.max_rpm,
+        "peak_rss_mb": args.max_rss_mb,
+    }
+    failed = [
+        key
+        for key, limit in limits.items()
+        if limit is not None and report[key] is not None and report[key] > limit
+    ]
+    for key in failed:
+        print(f"FAIL: {key} {report[key]} > {limits[key]}", file=sys.stderr)
+    for error in report["setup_errors"]:
+        print(f"FAIL: setup incomplete: {error}", file=sys.stderr)
+    return 1 if failed or report["setup_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())